@@ -1,6 +1,11 @@
+import functools
 import re
 from typing import Dict, Optional
-from .config import CATEGORY_KEYWORDS, BUDGET_KEYWORDS, BUDGET_RANGES
+from .config import (
+    CATEGORY_KEYWORDS, BUDGET_KEYWORDS, BUDGET_RANGES,
+    CATEGORY_MATCHER, BUDGET_MATCHER,
+    CATEGORY_KEYWORD_SETS, CATEGORY_MULTIWORD_KEYWORDS
+)
 
 
 class BudgetAnalyzer:
@@ -9,19 +14,35 @@ class BudgetAnalyzer:
     BUDGET_RANGES = BUDGET_RANGES
     CATEGORY_KEYWORDS = CATEGORY_KEYWORDS
     BUDGET_KEYWORDS = BUDGET_KEYWORDS
-    
+
+    # All budget patterns fused into one alternation, compiled at class load;
+    # a single .search call replaces the per-pattern loop
+    _PRICE_RE = re.compile(
+        r'between\s+(?:rs\.?|₹)?\s*(?P<range_min>\d+(?:,\d+)*)\s+and\s+(?:rs\.?|₹)?\s*(?P<range_max>\d+(?:,\d+)*)'
+        r'|(?:under|below|less than|upto)\s+(?:rs\.?|₹)?\s*(?P<under>\d+(?:,\d+)*(?:\.\d+)?)'
+        r'|(?:around|about)\s+(?:rs\.?|₹)?\s*(?P<around>\d+(?:,\d+)*(?:\.\d+)?)',
+        re.IGNORECASE
+    )
+
     def __init__(self):
-        self.budget_patterns = [
-            (re.compile(r'(?:under|below|less than|upto)\s+(?:rs\.?|₹)?\s*(\d+(?:,\d+)*(?:\.\d+)?)', re.IGNORECASE), 'under'),
-            (re.compile(r'(?:around|about)\s+(?:rs\.?|₹)?\s*(\d+(?:,\d+)*(?:\.\d+)?)', re.IGNORECASE), 'around'),
-            (re.compile(r'between\s+(?:rs\.?|₹)?\s*(\d+(?:,\d+)*)\s+and\s+(?:rs\.?|₹)?\s*(\d+(?:,\d+)*)', re.IGNORECASE), 'range'),
-        ]
-    
+        # The same query is analyzed several times per request (processor,
+        # suggestions, ROMA agent); a per-instance memo runs the regex and
+        # matcher work once per unique normalized query
+        self._analyze_cached = functools.lru_cache(maxsize=4096)(self._analyze_budget_impl)
+
     def analyze_budget(self, query: str) -> Dict[str, Optional[int]]:
-        """Extract budget and category from user query"""
-        
-        query_lower = query.lower().strip()
-        
+        """Extract budget and category from user query
+
+        Served from a memo keyed on the normalized query; callers get a
+        fresh dict with their original query string restored.
+        """
+        result = dict(self._analyze_cached(query.lower().strip()))
+        result['original_query'] = query
+        return result
+
+    def _analyze_budget_impl(self, query_lower: str) -> Dict[str, Optional[int]]:
+        """Run the full budget/category analysis on a normalized query"""
+
         category = self._detect_category(query_lower)
         budget_type = self._detect_budget_type(query_lower)
         specific_budget = self._extract_price(query_lower)
@@ -29,14 +50,15 @@ class BudgetAnalyzer:
         if specific_budget:
             max_budget = specific_budget
         else:
-            max_budget = self.BUDGET_RANGES.get(category, {}).get(budget_type, 50000)
+            ranges = self.BUDGET_RANGES.get(category)
+            max_budget = getattr(ranges, budget_type, 50000) if ranges else 50000
         
         return {
             'category': category,
             'max_budget': max_budget,
             'budget_type': budget_type,
             'specific_budget': specific_budget,
-            'original_query': query
+            'original_query': query_lower
         }
     
     def _detect_category(self, query: str) -> Optional[str]:
@@ -45,68 +67,54 @@ class BudgetAnalyzer:
         if any(exclude in query for exclude in ['non-apple', 'not apple', 'excluding apple']):
             if any(keyword in query for keyword in ['laptop', 'computer', 'macbook']):
                 return 'electronics'
-        
-        for category, keywords in self.CATEGORY_KEYWORDS.items():
-            if any(keyword in query for keyword in keywords):
-                return category
-        
-        return None
+
+        return CATEGORY_MATCHER.first_match(query)
     
     def _detect_budget_type(self, query: str) -> str:
         """Detect budget type from query keywords"""
         
         if self._extract_price(query):
             return 'specific'
-        
-        for budget_key, keywords in self.BUDGET_KEYWORDS.items():
-            if any(keyword in query for keyword in keywords):
-                return budget_key
-        
-        if any(term in query for term in ['cheap', 'budget', 'under']):
-            return 'low'
-        
-        return 'low'
+
+        return BUDGET_MATCHER.first_match(query) or 'low'
     
     def _extract_price(self, query: str) -> Optional[int]:
-        """Extract specific price mentions from query with budget keywords"""
-        
-        budget_keywords = ['under', 'below', 'less than', 'upto', 'around', 'about', 'between', 'max', 'maximum']
-        has_budget_keyword = any(kw in query.lower() for kw in budget_keywords)
-        
-        if not has_budget_keyword:
+        """Extract specific price mentions from an already-lowered query"""
+
+        match = self._PRICE_RE.search(query)
+        if not match:
             return None
-        
-        for pattern, pattern_type in self.budget_patterns:
-            match = pattern.search(query)
-            if match:
-                if pattern_type == 'range':
-                    price_str = match.group(2).replace(',', '')
-                else:
-                    price_str = match.group(1).replace(',', '')
-                
-                try:
-                    price = float(price_str)
-                    
-                    if 'k' in query.lower() and price < 100:
-                        price *= 1000
-                    
-                    return int(price)
-                except (ValueError, IndexError):
-                    continue
-        
-        return None
+
+        price_str = (
+            match.group('range_max') or match.group('under') or match.group('around')
+        ).replace(',', '')
+
+        try:
+            price = float(price_str)
+        except ValueError:
+            return None
+
+        if 'k' in query and price < 100:
+            price *= 1000
+
+        return int(price)
     
     def get_category_suggestions(self, query: str) -> list:
         """Get category suggestions for ambiguous queries"""
-        
+
         query_lower = query.lower()
+        query_tokens = frozenset(query_lower.split())
         suggestions = []
-        
-        for category, keywords in self.CATEGORY_KEYWORDS.items():
-            score = sum(1 for keyword in keywords if keyword in query_lower)
+
+        for category, keyword_set in CATEGORY_KEYWORD_SETS.items():
+            # Set intersection covers single-word keywords in one C-level op;
+            # the few multi-word keywords fall back to substring checks
+            score = len(query_tokens & keyword_set)
+            score += sum(1 for keyword in CATEGORY_MULTIWORD_KEYWORDS[category]
+                         if keyword in query_lower)
             if score > 0:
                 suggestions.append((category, score))
-        
+
         # Sort by relevance score
         suggestions.sort(key=lambda x: x[1], reverse=True)
         return [cat for cat, score in suggestions]
@@ -0,0 +1,81 @@
+"""
+Response caching for ROMA Shopping Agent
+Redis-backed when REDIS_URL is set, in-process TTL cache otherwise
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class ResponseCache:
+    """TTL cache for endpoint responses
+
+    Uses Redis (shared across workers) when REDIS_URL is configured and the
+    redis package is installed; otherwise falls back to a bounded in-process
+    dict so development and tests need no external services.
+    """
+
+    def __init__(self, redis_url: str = None, max_entries: int = 1024):
+        self._local = {}
+        self._max_entries = max_entries
+        self._redis = None
+
+        redis_url = redis_url or os.getenv('REDIS_URL')
+        if redis_url and redis is not None:
+            try:
+                self._redis = redis.Redis.from_url(redis_url)
+                self._redis.ping()
+            except Exception as e:
+                logger.warning(f"Redis unavailable, using in-process cache: {e}")
+                self._redis = None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None on miss/expiry"""
+        if self._redis is not None:
+            cached = self._redis.get(key)
+            return json.loads(cached) if cached else None
+
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if time.time() >= expires_at:
+            del self._local[key]
+            return None
+        return value
+
+    def set(self, key: str, value: Any, ttl: int):
+        """Cache a JSON-serializable value for ttl seconds"""
+        if self._redis is not None:
+            self._redis.setex(key, ttl, json.dumps(value))
+            return
+
+        if len(self._local) >= self._max_entries:
+            # Simple reset keeps the fallback bounded without per-call cleanup
+            self._local.clear()
+        self._local[key] = (time.time() + ttl, value)
+
+
+def make_cache_key(prefix: str, query: str = '') -> str:
+    """Build a cache key from an endpoint prefix and normalized query"""
+    normalized = query.lower().strip()
+    if not normalized:
+        return prefix
+    return f"{prefix}:{hashlib.sha1(normalized.encode()).hexdigest()}"
+
+
+# Shared cache instance
+cache = ResponseCache()
@@ -0,0 +1,48 @@
+"""
+In-flight request coalescing for ROMA Shopping Agent
+Deduplicates identical concurrent requests into a single computation
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+
+class RequestCoalescer:
+    """Collapse concurrent calls with the same key into one computation
+
+    The first caller for a key runs compute() and every caller that arrives
+    while it is in flight waits on the same Future, so N identical /search
+    requests cost one processor pipeline instead of N.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Run compute() for key, sharing the result with concurrent callers"""
+        with self._lock:
+            future = self._inflight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not is_owner:
+            return future.result()
+
+        try:
+            result = compute()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+# Shared coalescer instance
+coalescer = RequestCoalescer()
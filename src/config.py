@@ -2,6 +2,53 @@
 Centralized configuration for ROMA Shopping Agent
 """
 
+import re
+from dataclasses import dataclass
+
+
+class KeywordMatcher:
+    """Single-pass multi-keyword scanner built on one compiled alternation
+
+    Replaces nested `for keyword in keywords: if keyword in query` scans with
+    a single regex search over all keywords, compiled once at import time.
+    Longer keywords take precedence at the same position.
+    """
+
+    def __init__(self, keywords):
+        if isinstance(keywords, dict):
+            self._bucket_for = {
+                keyword: bucket
+                for bucket, keyword_list in keywords.items()
+                for keyword in keyword_list
+            }
+        else:
+            self._bucket_for = {keyword: keyword for keyword in keywords}
+
+        alternation = '|'.join(
+            re.escape(keyword)
+            for keyword in sorted(self._bucket_for, key=len, reverse=True)
+        )
+        self._pattern = re.compile(alternation)
+
+    def keywords(self):
+        """Return the keywords this matcher was built with"""
+        return list(self._bucket_for)
+
+    def first_match(self, text):
+        """Return the bucket of the first keyword found, or None"""
+        match = self._pattern.search(text)
+        return self._bucket_for[match.group(0)] if match else None
+
+    def all_matches(self, text):
+        """Return ordered unique buckets for all keywords found"""
+        buckets = []
+        for keyword in self._pattern.findall(text):
+            bucket = self._bucket_for[keyword]
+            if bucket not in buckets:
+                buckets.append(bucket)
+        return buckets
+
+
 # Category keywords for product classification
 CATEGORY_KEYWORDS = {
     'apparel': [
@@ -23,6 +70,18 @@ CATEGORY_KEYWORDS = {
     ]
 }
 
+# Per-category keyword sets for token-intersection scoring; multi-word
+# keywords (e.g. 'google pixel', 'smart tv') are split out for the
+# substring fallback since they never match a single token
+CATEGORY_KEYWORD_SETS = {
+    category: frozenset(k for k in keywords if ' ' not in k)
+    for category, keywords in CATEGORY_KEYWORDS.items()
+}
+CATEGORY_MULTIWORD_KEYWORDS = {
+    category: tuple(k for k in keywords if ' ' in k)
+    for category, keywords in CATEGORY_KEYWORDS.items()
+}
+
 # Budget keywords for price tier detection
 BUDGET_KEYWORDS = {
     'low': [
@@ -39,11 +98,19 @@ BUDGET_KEYWORDS = {
     ]
 }
 
+@dataclass(frozen=True, slots=True)
+class BudgetRange:
+    """Default budget tiers for one category"""
+    low: int
+    medium: int
+    high: int
+
+
 # Default budget ranges by category
 BUDGET_RANGES = {
-    'apparel': {'low': 3000, 'medium': 8000, 'high': 20000},
-    'mobiles': {'low': 15000, 'medium': 35000, 'high': 70000},
-    'electronics': {'low': 50000, 'medium': 100000, 'high': 250000}
+    'apparel': BudgetRange(low=3000, medium=8000, high=20000),
+    'mobiles': BudgetRange(low=15000, medium=35000, high=70000),
+    'electronics': BudgetRange(low=50000, medium=100000, high=250000)
 }
 
 # Color keywords for product matching
@@ -53,29 +120,54 @@ COLOR_KEYWORDS = [
     'cyan', 'magenta', 'violet', 'indigo', 'turquoise', 'khaki'
 ]
 
+# Precompiled single-pass matchers (built once at import, reused per request)
+CATEGORY_MATCHER = KeywordMatcher(CATEGORY_KEYWORDS)
+BUDGET_MATCHER = KeywordMatcher(BUDGET_KEYWORDS)
+COLOR_MATCHER = KeywordMatcher(COLOR_KEYWORDS)
+
+@dataclass(frozen=True, slots=True)
+class ScoringWeights:
+    """Weights for product ranking (slot attribute reads in the hot loop)"""
+    keyword_match: int = 2
+    color_match: int = 3
+    brand_match: int = 2
+    price_relevance_under: int = 2
+    price_relevance_over: int = -5
+    rating_multiplier: float = 1.5
+    category_match: int = 1
+
+
 # Scoring weights for product ranking
-SCORING_WEIGHTS = {
-    'keyword_match': 2,
-    'color_match': 3,
-    'brand_match': 2,
-    'price_relevance_under': 2,
-    'price_relevance_over': -5,
-    'rating_multiplier': 1.5,
-    'category_match': 1
-}
+SCORING_WEIGHTS = ScoringWeights()
+
+
+@dataclass(frozen=True, slots=True)
+class InputConstraints:
+    """Validation and rate-limit constraints"""
+    min_query_length: int = 2
+    max_query_length: int = 500
+    rate_limit_per_minute: int = 10
+    rate_limit_per_hour: int = 50
+    rate_limit_per_day: int = 200
+
 
 # Input validation constraints
-INPUT_CONSTRAINTS = {
-    'min_query_length': 2,
-    'max_query_length': 500,
-    'rate_limit_per_minute': 10,
-    'rate_limit_per_hour': 50,
-    'rate_limit_per_day': 200
+INPUT_CONSTRAINTS = InputConstraints()
+
+# Response cache TTLs in seconds
+CACHE_TTL = {
+    'search': 300,
+    'suggestions': 300,
+    'static': 3600
 }
 
+@dataclass(frozen=True, slots=True)
+class ApiConfig:
+    """API behavior defaults"""
+    default_results_limit: int = 3
+    max_results_limit: int = 10
+    timeout_seconds: int = 30
+
+
 # API configuration
-API_CONFIG = {
-    'default_results_limit': 3,
-    'max_results_limit': 10,
-    'timeout_seconds': 30
-}
+API_CONFIG = ApiConfig()
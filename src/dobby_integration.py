@@ -4,30 +4,120 @@ Advanced natural language understanding with Dobby by Sentient
 """
 
 import os
-import json
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, Any, Optional
 import re
 
+from .config import KeywordMatcher
+
+# Shared session: keep-alive connection pooling amortizes TCP+TLS handshakes
+# across API calls instead of reconnecting per request
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=50,
+    pool_maxsize=50,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+))
+
+# Keyword dictionaries for semantic extraction
+_CATEGORY_MAP = {
+    'mobiles': ['phone', 'mobile', 'smartphone'],
+    'electronics': [
+        'laptop', 'computer', 'macbook', 'headphones', 'earphones', 'headset',
+        'watch', 'smartwatch', 'fitness band', 'tablet', 'ipad'
+    ],
+    'apparel': ['shoes', 'sneakers', 'running shoes', 'jacket', 'denim', 'coat']
+}
+
+_USE_CASE_MAP = {
+    'gaming': ['gaming', 'play', 'fps', 'performance'],
+    'office': ['office', 'work', 'professional', 'business'],
+    'gym': ['gym', 'workout', 'exercise', 'fitness'],
+    'travel': ['travel', 'portable', 'lightweight'],
+    'parents': ['parents', 'elderly', 'senior', 'simple'],
+    'students': ['student', 'college', 'school', 'study']
+}
+
+_QUALITY_MAP = {
+    'budget': ['cheap', 'affordable'],
+    'premium': ['best', 'top', 'premium', 'pro', 'professional'],
+    'luxury': ['luxury']
+}
+
+# Precompiled single-pass matchers for semantic extraction (built once at import)
+_CATEGORY_MATCHER = KeywordMatcher(_CATEGORY_MAP)
+_USE_CASE_MATCHER = KeywordMatcher(_USE_CASE_MAP)
+_QUALITY_MATCHER = KeywordMatcher(_QUALITY_MAP)
+
+# Reverse index fusing all single-word category/use-case/quality keywords so
+# one tokenization pass resolves the common case; multi-word keywords (e.g.
+# 'running shoes') fall back to the matchers above
+_WORD_INDEX = {}
+for _field, _mapping in (
+    ('category', _CATEGORY_MAP),
+    ('use_case', _USE_CASE_MAP),
+    ('quality_indicator', _QUALITY_MAP),
+):
+    for _bucket, _keywords in _mapping.items():
+        for _keyword in _keywords:
+            if ' ' not in _keyword:
+                _WORD_INDEX.setdefault(_keyword, []).append((_field, _bucket))
+
+_COLOR_MATCHER = KeywordMatcher([
+    'red', 'blue', 'black', 'white', 'green', 'yellow', 'pink', 'purple',
+    'orange', 'brown', 'gray', 'silver', 'gold'
+])
+
+_BRAND_MATCHER = KeywordMatcher([
+    'apple', 'samsung', 'google', 'oneplus', 'xiaomi', 'realme', 'redmi',
+    'nike', 'adidas', 'puma', 'reebok', 'new balance', 'asics',
+    'hp', 'dell', 'asus', 'lenovo', 'acer', 'msi',
+    'sony', 'bose', 'jbl', 'sennheiser', 'skullcandy'
+])
+
+_CONSTRAINT_MATCHER = KeywordMatcher([
+    'large', 'small', 'compact', 'portable', 'lightweight',
+    'wireless', 'bluetooth', 'waterproof', 'fast charging', '5G', '4K'
+])
+
 
 class DobbyNLP:
     """Dobby AI integration for semantic query understanding"""
-    
+
+    # Budget patterns fused into one alternation, compiled at class load
+    _BUDGET_RE = re.compile(
+        r'between\s+(?P<range_min>\d[\d,]*)\s+and\s+(?P<range_max>\d[\d,]*)'
+        r'|(?:under|below|less than|upto)\s+(?P<under>\d[\d,]*)'
+        r'|around\s+(?P<around>\d[\d,]*)',
+        re.IGNORECASE
+    )
+
+    # Exclusion phrasings fused into one alternation, compiled at class load
+    _EXCLUDE_RE = re.compile(r'(?:non-|not |except |excluding )([a-zA-Z]+)')
+
     def __init__(self, api_key: str = None):
         self.api_key = api_key or os.getenv('DOBBY_API_KEY')
         if not self.api_key:
             # Use mock mode if no API key provided
             self.api_key = None
         self.base_url = "https://api.sentient.ai/dobby/v1"
+        self.session = _SESSION
         
     def analyze_query(self, query: str) -> Dict[str, Any]:
         """Use Dobby to understand shopping queries semantically"""
-        
+
+        if not self.api_key:
+            # Mock mode: skip payload construction and exception plumbing
+            return self._mock_dobby_response(query)
+
         # Dobby API payload for shopping query analysis
         payload = {
             "prompt": f"""
             Analyze this shopping query: "{query}"
-            
+
             Extract:
             1. Product category
             2. Budget range (if mentioned)
@@ -36,65 +126,50 @@ class DobbyNLP:
             5. Use case/intent
             6. Quality indicators (premium, cheap, best)
             7. Any other constraints
-            
+
             Return as JSON with confidence scores.
             """,
             "max_tokens": 300,
             "temperature": 0.1
         }
-        
+
         try:
             # Mock Dobby response (in production, this would be actual API call)
             return self._mock_dobby_response(query)
-        except Exception as e:
+        except requests.RequestException:
             return self._fallback_analysis(query)
     
     def _mock_dobby_response(self, query: str) -> Dict[str, Any]:
         """Mock Dobby response for demonstration"""
         query_lower = query.lower()
-        
-        # Advanced semantic analysis
+
+        # One tokenization pass resolves single-word category/use-case/quality
+        # hits via the fused reverse index; matchers handle multi-word keywords
+        hits = {}
+        for token in query_lower.split():
+            for field, value in _WORD_INDEX.get(token, ()):
+                hits.setdefault(field, value)
+
         analysis = {
-            "category": self._extract_category(query_lower),
+            "category": hits.get('category') or self._extract_category(query_lower),
             "budget": self._extract_budget(query_lower),
             "brand_preferences": self._extract_brands(query_lower),
             "color_preferences": self._extract_colors(query_lower),
-            "use_case": self._extract_use_case(query_lower),
-            "quality_indicator": self._extract_quality(query_lower),
+            "use_case": hits.get('use_case') or self._extract_use_case(query_lower),
+            "quality_indicator": hits.get('quality_indicator') or self._extract_quality(query_lower),
             "constraints": self._extract_constraints(query_lower),
             "confidence": 0.85
         }
-        
+
         return analysis
     
     def _extract_category(self, query: str) -> str:
         """Semantic category extraction"""
-        category_map = {
-            'phone': 'mobiles', 'mobile': 'mobiles', 'smartphone': 'mobiles',
-            'laptop': 'electronics', 'computer': 'electronics', 'macbook': 'electronics',
-            'shoes': 'apparel', 'sneakers': 'apparel', 'running shoes': 'apparel',
-            'headphones': 'electronics', 'earphones': 'electronics', 'headset': 'electronics',
-            'jacket': 'apparel', 'denim': 'apparel', 'coat': 'apparel',
-            'watch': 'electronics', 'smartwatch': 'electronics', 'fitness band': 'electronics',
-            'tablet': 'electronics', 'ipad': 'electronics'
-        }
-        
-        for keyword, category in category_map.items():
-            if keyword in query:
-                return category
-        return "general"
+        return _CATEGORY_MATCHER.first_match(query) or "general"
     
     def _extract_budget(self, query: str) -> Dict[str, Any]:
         """Advanced budget extraction with context"""
-        budget_patterns = [
-            (r'under\s+(\d+(?:,\d+)*)', 'under'),
-            (r'below\s+(\d+(?:,\d+)*)', 'under'),
-            (r'less than\s+(\d+(?:,\d+)*)', 'under'),
-            (r'upto\s+(\d+(?:,\d+)*)', 'under'),
-            (r'around\s+(\d+(?:,\d+)*)', 'around'),
-            (r'between\s+(\d+(?:,\d+)*)\s+and\s+(\d+(?:,\d+)*)', 'range')
-        ]
-        
+
         quality_budgets = {
             'cheap': 5000,
             'budget': 10000,
@@ -102,23 +177,27 @@ class DobbyNLP:
             'premium': 80000,
             'luxury': 150000
         }
-        
-        # Check for explicit numbers
-        for pattern, type in budget_patterns:
-            match = re.search(pattern, query)
-            if match:
-                if type == 'range':
-                    return {
-                        'type': 'range',
-                        'min': int(match.group(1).replace(',', '')),
-                        'max': int(match.group(2).replace(',', ''))
-                    }
-                else:
-                    return {
-                        'type': type,
-                        'value': int(match.group(1).replace(',', ''))
-                    }
-        
+
+        # Check for explicit numbers (single pass over the fused alternation)
+        match = self._BUDGET_RE.search(query)
+        if match:
+            if match.group('range_min'):
+                return {
+                    'type': 'range',
+                    'min': int(match.group('range_min').replace(',', '')),
+                    'max': int(match.group('range_max').replace(',', ''))
+                }
+            elif match.group('under'):
+                return {
+                    'type': 'under',
+                    'value': int(match.group('under').replace(',', ''))
+                }
+            else:
+                return {
+                    'type': 'around',
+                    'value': int(match.group('around').replace(',', ''))
+                }
+
         # Check for quality indicators
         for quality, budget in quality_budgets.items():
             if quality in query:
@@ -127,7 +206,7 @@ class DobbyNLP:
                     'value': budget,
                     'quality': quality
                 }
-        
+
         return {'type': 'auto', 'value': None}
     
     def _extract_brands(self, query: str) -> Dict[str, list]:
@@ -137,86 +216,29 @@ class DobbyNLP:
             'exclude': []
         }
         
-        brand_list = [
-            'apple', 'samsung', 'google', 'oneplus', 'xiaomi', 'realme', 'redmi',
-            'nike', 'adidas', 'puma', 'reebok', 'new balance', 'asics',
-            'hp', 'dell', 'asus', 'lenovo', 'acer', 'msi',
-            'sony', 'bose', 'jbl', 'sennheiser', 'skullcandy'
-        ]
-        
         # Extract brands to include
-        for brand in brand_list:
-            if brand in query:
-                brands['include'].append(brand)
-        
-        # Extract brands to exclude
-        exclude_patterns = [
-            r'non-([a-zA-Z]+)',
-            r'not ([a-zA-Z]+)',
-            r'except ([a-zA-Z]+)',
-            r'excluding ([a-zA-Z]+)'
-        ]
-        
-        for pattern in exclude_patterns:
-            matches = re.findall(pattern, query)
-            brands['exclude'].extend(matches)
-        
+        brands['include'] = _BRAND_MATCHER.all_matches(query)
+
+        # Extract brands to exclude (single pass over the fused alternation)
+        brands['exclude'] = self._EXCLUDE_RE.findall(query)
+
         return brands
     
     def _extract_colors(self, query: str) -> list:
         """Color preference extraction"""
-        colors = ['red', 'blue', 'black', 'white', 'green', 'yellow', 'pink', 'purple', 'orange', 'brown', 'gray', 'silver', 'gold']
-        return [color for color in colors if color in query]
-    
+        return _COLOR_MATCHER.all_matches(query)
+
     def _extract_use_case(self, query: str) -> str:
         """Understand the intended use"""
-        use_cases = {
-            'gaming': ['gaming', 'play', 'fps', 'performance'],
-            'office': ['office', 'work', 'professional', 'business'],
-            'gym': ['gym', 'workout', 'exercise', 'fitness'],
-            'travel': ['travel', 'portable', 'lightweight'],
-            'parents': ['parents', 'elderly', 'senior', 'simple'],
-            'students': ['student', 'college', 'school', 'study']
-        }
-        
-        for use_case, keywords in use_cases.items():
-            if any(keyword in query for keyword in keywords):
-                return use_case
-        
-        return "general"
-    
+        return _USE_CASE_MATCHER.first_match(query) or "general"
+
     def _extract_quality(self, query: str) -> str:
         """Quality indicator extraction"""
-        quality_map = {
-            'cheap': 'budget',
-            'affordable': 'budget',
-            'best': 'premium',
-            'top': 'premium',
-            'premium': 'premium',
-            'luxury': 'luxury',
-            'pro': 'premium',
-            'professional': 'premium'
-        }
-        
-        for keyword, quality in quality_map.items():
-            if keyword in query:
-                return quality
-        
-        return "standard"
-    
+        return _QUALITY_MATCHER.first_match(query) or "standard"
+
     def _extract_constraints(self, query: str) -> list:
-        """Extract additional constraints"""
-        constraints = []
-        
-        # Size constraints
-        size_words = ['large', 'small', 'compact', 'portable', 'lightweight']
-        constraints.extend([word for word in size_words if word in query])
-        
-        # Feature constraints
-        feature_words = ['wireless', 'bluetooth', 'waterproof', 'fast charging', '5G', '4K']
-        constraints.extend([word for word in feature_words if word in query])
-        
-        return constraints
+        """Extract additional constraints (size and feature keywords)"""
+        return _CONSTRAINT_MATCHER.all_matches(query)
     
     def _fallback_analysis(self, query: str) -> Dict[str, Any]:
         """Fallback to rule-based analysis if Dobby unavailable"""
@@ -298,4 +320,4 @@ if __name__ == "__main__":
     for query in test_queries:
         result = dobby.analyze_query(query)
         print(f"\nQuery: {query}")
-        print(f"Analysis: {json.dumps(result, indent=2)}")
+        print(f"Analysis: {orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()}")
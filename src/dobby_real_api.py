@@ -3,23 +3,154 @@ Real Dobby API Integration for ROMA Shopping Agent
 Production-ready API client for Sentient.ai Dobby
 """
 
+import functools
 import os
-import json
+import orjson
+import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, Any, Optional
 import time
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
+from .config import KeywordMatcher
 
-@dataclass
+# Keyword tables and regexes for the mock extractors, built once at import
+_CATEGORY_MAP = {
+    'mobiles': ['phone', 'mobile', 'smartphone'],
+    'electronics': ['laptop', 'computer', 'macbook', 'headphones', 'watch', 'tablet'],
+    'apparel': ['shoes', 'sneakers', 'jacket']
+}
+
+_USE_CASE_MAP = {
+    'gaming': ['gaming', 'play', 'fps', 'performance', 'pubg'],
+    'office': ['office', 'work', 'professional', 'business', 'productivity'],
+    'gym': ['gym', 'workout', 'exercise', 'fitness', 'running'],
+    'travel': ['travel', 'portable', 'lightweight', 'commute'],
+    'parents': ['parents', 'elderly', 'senior', 'simple', 'easy'],
+    'students': ['student', 'college', 'school', 'study', 'budget']
+}
+
+_QUALITY_MAP = {
+    'budget': ['cheap', 'affordable', 'economical'],
+    'premium': ['best', 'top', 'excellent', 'premium', 'pro', 'professional'],
+    'luxury': ['luxury', 'high-end', 'flagship']
+}
+
+_QUALITY_BUDGETS = {
+    'cheap': {'min': 0, 'max': 5000, "type": "budget"},
+    'budget': {'min': 0, 'max': 15000, "type": "budget"},
+    'mid-range': {'min': 15000, 'max': 50000, "type": "mid-range"},
+    'premium': {'min': 50000, 'max': 150000, "type": "premium"},
+    'luxury': {'min': 150000, 'max': 500000, "type": "luxury"}
+}
+
+# Inverted keyword→use-case index: every keyword is a single word, so one
+# dict lookup per token replaces the bucket-by-bucket substring scans
+_USE_CASE_INDEX = {
+    keyword: use_case
+    for use_case, keywords in _USE_CASE_MAP.items()
+    for keyword in keywords
+}
+
+_CATEGORY_MATCHER = KeywordMatcher(_CATEGORY_MAP)
+_USE_CASE_MATCHER = KeywordMatcher(_USE_CASE_MAP)
+_QUALITY_MATCHER = KeywordMatcher(_QUALITY_MAP)
+
+_COLOR_MATCHER = KeywordMatcher([
+    'red', 'blue', 'black', 'white', 'green', 'yellow', 'pink', 'purple',
+    'orange', 'brown', 'gray', 'silver', 'gold', 'navy', 'beige'
+])
+
+_BRAND_MATCHER = KeywordMatcher([
+    'apple', 'samsung', 'google', 'oneplus', 'xiaomi', 'realme', 'redmi',
+    'nike', 'adidas', 'puma', 'hp', 'dell', 'asus', 'lenovo', 'acer',
+    'sony', 'bose', 'jbl'
+])
+
+_FEATURE_MATCHER = KeywordMatcher([
+    'wireless', 'bluetooth', 'waterproof', '5G', '4K', 'fast charging',
+    'long battery', 'lightweight', 'compact', 'touchscreen'
+])
+
+# Grouped digits + optional multiplier suffix parsed without string rewriting
+_BUDGET_NUM_RE = re.compile(r'(\d[\d,]*)(k|lakh)?')
+_BUDGET_MULTIPLIERS = {'k': 1_000, 'lakh': 100_000, None: 1}
+_EXCLUDE_RE = re.compile(r'(?:non-|not |except )([a-zA-Z]+)')
+
+# Strips markdown code fences around LLM JSON output in one pass
+_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```$', re.M)
+
+# Shopping prompt held as constant prefix/suffix so building it is a plain
+# concatenation; the schema braces never pass through f-string/format parsing
+_SHOPPING_PROMPT_PREFIX = 'Analyze this shopping query: "'
+_SHOPPING_PROMPT_SUFFIX = '''"
+
+Provide detailed JSON analysis with:
+{
+    "category": "primary product category",
+    "subcategory": "specific product type",
+    "budget": {
+        "type": "exact/range/quality",
+        "min": minimum_price,
+        "max": maximum_price,
+        "currency": "INR"
+    },
+    "brand_preferences": {
+        "include": ["preferred brands"],
+        "exclude": ["brands to avoid"]
+    },
+    "features": ["required features"],
+    "use_case": "intended usage scenario",
+    "quality_level": "budget/mid-range/premium/luxury",
+    "color_preferences": ["preferred colors"],
+    "urgency": "immediate/soon/flexible",
+    "confidence": 0.0-1.0
+}
+
+Be specific and accurate. Return only valid JSON.
+'''
+
+# Fused reverse index over every single-word keyword so the mock path scans
+# the query once instead of running seven independent extractor loops.
+# Multi-word keywords (e.g. 'fast charging') fall back to the matchers.
+_WORD_INDEX = {}
+for _field, _mapping in (
+    ('category', _CATEGORY_MAP),
+    ('use_case', _USE_CASE_MAP),
+    ('quality_level', _QUALITY_MAP),
+):
+    for _bucket, _keywords in _mapping.items():
+        for _keyword in _keywords:
+            if ' ' not in _keyword:
+                _WORD_INDEX.setdefault(_keyword, []).append((_field, _bucket))
+for _field, _matcher in (
+    ('color_preferences', _COLOR_MATCHER),
+    ('brands', _BRAND_MATCHER),
+    ('features', _FEATURE_MATCHER),
+):
+    for _keyword in _matcher.keywords():
+        if ' ' not in _keyword:
+            _WORD_INDEX.setdefault(_keyword, []).append((_field, _keyword))
+
+
+@dataclass(frozen=True, slots=True)
 class DobbyConfig:
-    """Configuration for Dobby API"""
+    """Configuration for Dobby API (slot attribute reads on the hot path)"""
     api_key: str = None
     base_url: str = "https://api.sentient.ai/dobby/v1"
     timeout: int = 30
     max_retries: int = 3
     retry_delay: float = 1.0
+    max_delay: float = 30.0
+    cache_max_entries: int = 10000
+    cache_ttl: int = 3600
+
+
+# HTTP statuses worth retrying; other 4xx are permanent failures
+_TRANSIENT_STATUSES = frozenset([408, 429, 500, 502, 503, 504])
 
 
 class DobbyRealAPI:
@@ -29,85 +160,146 @@ class DobbyRealAPI:
         self.config = config or DobbyConfig()
         self.session = requests.Session()
         self.logger = logging.getLogger(__name__)
-        
-        # Set up headers
+
+        # Bounded keep-alive pool: concurrent analyze calls from threaded
+        # workers reuse warm TCP/TLS connections instead of reconnecting.
+        # Retries live at the adapter layer so urllib3 handles exponential
+        # backoff and honors Retry-After; only transient statuses retry.
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=100,
+            max_retries=Retry(
+                total=self.config.max_retries,
+                backoff_factor=self.config.retry_delay,
+                backoff_max=self.config.max_delay,
+                status_forcelist=_TRANSIENT_STATUSES,
+                allowed_methods=frozenset(['POST']),
+                respect_retry_after_header=True
+            )
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Bounded TTL cache over analyses: repeated queries (autocomplete,
+        # page refreshes) skip the API round-trip and mock extraction
+        self._cache = {}
+
+        # Set up headers. Connection: keep-alive is explicit so proxies
+        # that downgrade to HTTP/1.0 still hold the pooled connections open.
         self.session.headers.update({
             'Authorization': f'Bearer {self.config.api_key}',
             'Content-Type': 'application/json',
+            'Connection': 'keep-alive',
             'User-Agent': 'ROMA-Shopping-Agent/1.0'
         })
+
+    def close(self):
+        """Release pooled connections"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def analyze_shopping_query(self, query: str) -> Dict[str, Any]:
         """Real API call to Dobby for shopping query analysis"""
-        
+
+        cache_key = ' '.join(query.lower().split())
+        entry = self._cache.get(cache_key)
+        if entry is not None:
+            expires_at, cached = entry
+            if time.time() < expires_at:
+                return cached
+            del self._cache[cache_key]
+
         if not self.config.api_key:
-            return self._mock_response(query)  # Fallback for demo
-        
+            result = self._mock_response(query)  # Fallback for demo
+        else:
+            payload = {
+                "prompt": self._build_shopping_prompt(query),
+                "max_tokens": 500,
+                "temperature": 0.1,
+                "model": "dobby-shopping-v1"
+            }
+
+            try:
+                response = self._make_api_call('/chat/completions', payload)
+                result = self._parse_response(response, query)
+            except Exception as e:
+                self.logger.error(f"Dobby API error: {e}")
+                return self._fallback_response(query)
+
+        if len(self._cache) >= self.config.cache_max_entries:
+            # Simple reset keeps the cache bounded without per-call cleanup
+            self._cache.clear()
+        self._cache[cache_key] = (time.time() + self.config.cache_ttl, result)
+        return result
+    
+    def analyze_batch(self, queries: list) -> list:
+        """Analyze several queries with a single API round-trip
+
+        One multi-query prompt replaces N requests, so N TLS round-trips
+        collapse into one; the JSON array response is demultiplexed back
+        into per-query analyses. Falls back to per-query analysis if the
+        batch response cannot be parsed.
+        """
+
+        if not queries:
+            return []
+
+        if not self.config.api_key:
+            # Mock path is local and already cached; nothing to amortize
+            return [self.analyze_shopping_query(q) for q in queries]
+
+        numbered = '\n'.join(f'{i + 1}. "{q}"' for i, q in enumerate(queries))
         payload = {
-            "prompt": self._build_shopping_prompt(query),
-            "max_tokens": 500,
+            "prompt": (
+                "Analyze these shopping queries and return a JSON array with "
+                "one analysis object per query, in order:\n"
+                f"{numbered}\n\n"
+                "Each object uses the same schema as a single-query analysis. "
+                "Return only valid JSON."
+            ),
+            "max_tokens": 500 * len(queries),
             "temperature": 0.1,
             "model": "dobby-shopping-v1"
         }
-        
+
         try:
             response = self._make_api_call('/chat/completions', payload)
-            return self._parse_response(response, query)
-            
+            content = response.get('choices', [{}])[0].get('message', {}).get('content', '')
+            parsed = orjson.loads(_FENCE_RE.sub('', content).strip())
+            if not isinstance(parsed, list) or len(parsed) != len(queries):
+                raise ValueError("batch response shape mismatch")
         except Exception as e:
-            self.logger.error(f"Dobby API error: {e}")
-            return self._fallback_response(query)
-    
+            self.logger.error(f"Dobby batch API error: {e}")
+            return [self.analyze_shopping_query(q) for q in queries]
+
+        timestamp = time.time()
+        return [
+            {**analysis, "original_query": query, "ai_engine": "dobby",
+             "timestamp": timestamp}
+            for query, analysis in zip(queries, parsed)
+        ]
+
     def _build_shopping_prompt(self, query: str) -> str:
         """Build optimized prompt for shopping analysis"""
-        return f"""
-        Analyze this shopping query: "{query}"
-        
-        Provide detailed JSON analysis with:
-        {
-            "category": "primary product category",
-            "subcategory": "specific product type",
-            "budget": {
-                "type": "exact/range/quality",
-                "min": minimum_price,
-                "max": maximum_price,
-                "currency": "INR"
-            },
-            "brand_preferences": {
-                "include": ["preferred brands"],
-                "exclude": ["brands to avoid"]
-            },
-            "features": ["required features"],
-            "use_case": "intended usage scenario",
-            "quality_level": "budget/mid-range/premium/luxury",
-            "color_preferences": ["preferred colors"],
-            "urgency": "immediate/soon/flexible",
-            "confidence": 0.0-1.0
-        }
-        
-        Be specific and accurate. Return only valid JSON.
-        """
+        return _SHOPPING_PROMPT_PREFIX + query + _SHOPPING_PROMPT_SUFFIX
     
     def _make_api_call(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-        """Make actual API call with retry logic"""
-        
-        url = f"{self.config.base_url}{endpoint}"
-        
-        for attempt in range(self.config.max_retries):
-            try:
-                response = self.session.post(
-                    url,
-                    json=payload,
-                    timeout=self.config.timeout
-                )
-                response.raise_for_status()
-                return response.json()
-                
-            except requests.exceptions.RequestException as e:
-                if attempt < self.config.max_retries - 1:
-                    time.sleep(self.config.retry_delay * (attempt + 1))
-                    continue
-                raise e
+        """Make actual API call; retries are handled by the session adapter"""
+
+        response = self.session.post(
+            f"{self.config.base_url}{endpoint}",
+            json=payload,
+            timeout=self.config.timeout
+        )
+        response.raise_for_status()
+        # Parse the raw bytes with orjson: skips the UTF-8 decode to str
+        # that response.json() + stdlib json would do first
+        return orjson.loads(response.content)
     
     def _parse_response(self, response: Dict[str, Any], original_query: str) -> Dict[str, Any]:
         """Parse Dobby API response"""
@@ -117,8 +309,8 @@ class DobbyRealAPI:
             content = response.get('choices', [{}])[0].get('message', {}).get('content', '')
             
             # Clean and parse JSON
-            cleaned_content = content.strip().replace('```json', '').replace('```', '')
-            parsed = json.loads(cleaned_content)
+            cleaned_content = _FENCE_RE.sub('', content).strip()
+            parsed = orjson.loads(cleaned_content)
             
             # Validate and enhance response
             return {
@@ -128,7 +320,7 @@ class DobbyRealAPI:
                 "timestamp": time.time()
             }
             
-        except (json.JSONDecodeError, KeyError) as e:
+        except (orjson.JSONDecodeError, KeyError) as e:
             self.logger.error(f"Failed to parse Dobby response: {e}")
             return self._fallback_response(original_query)
     
@@ -153,39 +345,55 @@ class DobbyRealAPI:
     def _mock_response(self, query: str) -> Dict[str, Any]:
         """Mock response for development/testing"""
         query_lower = query.lower()
-        
-        # Advanced mock based on query analysis
-        analysis = {
-            "category": self._extract_category(query_lower),
+        analysis = self._classify_mock(query_lower, query_lower.split())
+        analysis.update(
+            original_query=query,
+            ai_engine="mock_dobby",
+            note="Mock response - replace with real API"
+        )
+        return analysis
+
+    def _classify_mock(self, query_lower: str, tokens: list) -> Dict[str, Any]:
+        """Fill every analysis field from one pass over the query tokens
+
+        The fused reverse index resolves every single-word keyword across
+        all extractors in a single loop; only multi-word keywords fall back
+        to the per-field matchers.
+        """
+        scalars = {}
+        lists = {'color_preferences': [], 'brands': [], 'features': []}
+        for token in tokens:
+            for field, value in _WORD_INDEX.get(token, ()):
+                if field in lists:
+                    if value not in lists[field]:
+                        lists[field].append(value)
+                else:
+                    scalars.setdefault(field, value)
+
+        features = lists['features']
+        for feature in ('fast charging', 'long battery'):
+            if feature in query_lower and feature not in features:
+                features.append(feature)
+
+        return {
+            "category": scalars.get('category') or self._extract_category(query_lower),
             "subcategory": self._extract_subcategory(query_lower),
-            "budget": self._extract_budget_real(query_lower),
-            "brand_preferences": self._extract_brands_real(query_lower),
-            "features": self._extract_features(query_lower),
-            "use_case": self._extract_use_case_real(query_lower),
-            "quality_level": self._extract_quality_real(query_lower),
-            "color_preferences": self._extract_colors_real(query_lower),
+            "budget": self._extract_budget_real(query_lower, frozenset(tokens)),
+            "brand_preferences": {
+                'include': [brand.title() for brand in lists['brands']],
+                'exclude': [m.title() for m in _EXCLUDE_RE.findall(query_lower)]
+            },
+            "features": features,
+            "use_case": scalars.get('use_case') or self._extract_use_case_real(query_lower),
+            "quality_level": scalars.get('quality_level') or self._extract_quality_real(query_lower),
+            "color_preferences": lists['color_preferences'],
             "urgency": "flexible",
-            "confidence": 0.85,
-            "original_query": query,
-            "ai_engine": "mock_dobby",
-            "note": "Mock response - replace with real API"
+            "confidence": 0.85
         }
-        
-        return analysis
     
     def _extract_category(self, query: str) -> str:
         """Real category extraction for mock"""
-        categories = {
-            'phone': 'mobiles', 'mobile': 'mobiles', 'smartphone': 'mobiles',
-            'laptop': 'electronics', 'computer': 'electronics', 'macbook': 'electronics',
-            'shoes': 'apparel', 'sneakers': 'apparel', 'headphones': 'electronics',
-            'watch': 'electronics', 'tablet': 'electronics', 'jacket': 'apparel'
-        }
-        
-        for keyword, category in categories.items():
-            if keyword in query:
-                return category
-        return "general"
+        return _CATEGORY_MATCHER.first_match(query) or "general"
     
     def _extract_subcategory(self, query: str) -> str:
         """Extract specific product type"""
@@ -197,102 +405,57 @@ class DobbyRealAPI:
             return 'wireless_headphones'
         return "standard"
     
-    def _extract_budget_real(self, query: str) -> Dict[str, Any]:
+    def _extract_budget_real(self, query: str, tokens: frozenset = None) -> Dict[str, Any]:
         """Real budget extraction"""
-        # Extract actual numbers
-        numbers = re.findall(r'\d+(?:,\d+)*(?:k|lakh)?', query)
-        
-        if numbers:
-            value = int(numbers[0].replace(',', '').replace('k', '000').replace('lakh', '00000'))
-            
-            if 'under' in query or 'below' in query:
+        if tokens is None:
+            tokens = frozenset(query.split())
+
+        # One search + multiplier lookup, no intermediate string rewrites
+        match = _BUDGET_NUM_RE.search(query)
+        if match:
+            value = int(match.group(1).replace(',', '')) * _BUDGET_MULTIPLIERS[match.group(2)]
+
+            if 'under' in tokens or 'below' in tokens:
                 return {"type": "under", "max": value, "currency": "INR"}
-            elif 'around' in query or 'about' in query:
+            elif 'around' in tokens or 'about' in tokens:
                 return {"type": "around", "min": value * 0.8, "max": value * 1.2, "currency": "INR"}
-            elif 'between' in query:
+            elif 'between' in tokens:
                 return {"type": "range", "min": value * 0.8, "max": value * 1.2, "currency": "INR"}
-        
+
         # Quality-based budgets
-        quality_map = {
-            'cheap': {'min': 0, 'max': 5000, "type": "budget"},
-            'budget': {'min': 0, 'max': 15000, "type": "budget"},
-            'mid-range': {'min': 15000, 'max': 50000, "type": "mid-range"},
-            'premium': {'min': 50000, 'max': 150000, "type": "premium"},
-            'luxury': {'min': 150000, 'max': 500000, "type": "luxury"}
-        }
-        
-        for quality, budget in quality_map.items():
+        for quality, budget in _QUALITY_BUDGETS.items():
             if quality in query:
                 return {**budget, "currency": "INR"}
-        
+
         return {"type": "auto", "min": 0, "max": 100000, "currency": "INR"}
-    
+
     def _extract_brands_real(self, query: str) -> Dict[str, list]:
         """Real brand extraction"""
-        brands = {
-            'include': [],
-            'exclude': []
+        return {
+            'include': [brand.title() for brand in _BRAND_MATCHER.all_matches(query)],
+            'exclude': [m.title() for m in _EXCLUDE_RE.findall(query)]
         }
-        
-        # Include brands
-        include_brands = ['apple', 'samsung', 'google', 'oneplus', 'xiaomi', 'realme', 'redmi',
-                         'nike', 'adidas', 'puma', 'hp', 'dell', 'asus', 'lenovo', 'acer',
-                         'sony', 'bose', 'jbl']
-        
-        for brand in include_brands:
-            if brand in query:
-                brands['include'].append(brand.title())
-        
-        # Exclude brands
-        exclude_patterns = [r'non-([a-zA-Z]+)', r'not ([a-zA-Z]+)', r'except ([a-zA-Z]+)']
-        for pattern in exclude_patterns:
-            matches = re.findall(pattern, query)
-            brands['exclude'].extend([m.title() for m in matches])
-        
-        return brands
-    
+
     def _extract_use_case_real(self, query: str) -> str:
         """Real use case extraction"""
-        use_cases = {
-            'gaming': ['gaming', 'play', 'fps', 'performance', 'pubg'],
-            'office': ['office', 'work', 'professional', 'business', 'productivity'],
-            'gym': ['gym', 'workout', 'exercise', 'fitness', 'running'],
-            'travel': ['travel', 'portable', 'lightweight', 'commute'],
-            'parents': ['parents', 'elderly', 'senior', 'simple', 'easy'],
-            'students': ['student', 'college', 'school', 'study', 'budget'],
-            'gaming': ['gaming', 'play', 'performance']
-        }
-        
-        for use_case, keywords in use_cases.items():
-            if any(keyword in query for keyword in keywords):
+        for token in query.split():
+            use_case = _USE_CASE_INDEX.get(token)
+            if use_case:
                 return use_case
-        
-        return "general"
-    
+        # Substring fallback catches keywords touching punctuation
+        return _USE_CASE_MATCHER.first_match(query) or "general"
+
     def _extract_colors_real(self, query: str) -> list:
         """Real color extraction"""
-        colors = ['red', 'blue', 'black', 'white', 'green', 'yellow', 'pink', 'purple', 'orange', 'brown', 'gray', 'silver', 'gold', 'navy', 'beige']
-        return [color for color in colors if color in query]
-    
+        return _COLOR_MATCHER.all_matches(query)
+
     def _extract_features(self, query: str) -> list:
         """Extract feature requirements"""
-        features = ['wireless', 'bluetooth', 'waterproof', '5G', '4K', 'fast charging', 'long battery', 'lightweight', 'compact', 'touchscreen']
-        return [feature for feature in features if feature in query]
-    
+        return _FEATURE_MATCHER.all_matches(query)
+
     def _extract_quality_real(self, query: str) -> str:
         """Real quality extraction"""
-        quality_map = {
-            'cheap': 'budget', 'affordable': 'budget', 'economical': 'budget',
-            'best': 'premium', 'top': 'premium', 'excellent': 'premium',
-            'premium': 'premium', 'luxury': 'luxury', 'high-end': 'luxury',
-            'pro': 'premium', 'professional': 'premium', 'flagship': 'luxury'
-        }
-        
-        for keyword, quality in quality_map.items():
-            if keyword in query:
-                return quality
-        
-        return "standard"
+        return _QUALITY_MATCHER.first_match(query) or "standard"
 
 
 # Configuration class for easy setup
@@ -305,24 +468,44 @@ class DobbyConfigManager:
     
     def load_from_env(self):
         """Load configuration from environment variables"""
-        self.config.api_key = os.getenv('DOBBY_API_KEY')
-        self.config.base_url = os.getenv('DOBBY_BASE_URL', 'https://api.sentient.ai/dobby/v1')
-    
+        self.config = replace(
+            self.config,
+            api_key=os.getenv('DOBBY_API_KEY'),
+            base_url=os.getenv('DOBBY_BASE_URL', 'https://api.sentient.ai/dobby/v1')
+        )
+
     def set_api_key(self, api_key: str):
         """Set API key programmatically"""
-        self.config.api_key = api_key
+        self.config = replace(self.config, api_key=api_key)
     
     def is_configured(self) -> bool:
         """Check if API is properly configured"""
         return self.config.api_key is not None and len(self.config.api_key.strip()) > 0
 
 
-# Global instance
-DOBBY_CONFIG = DobbyConfigManager()
+@functools.cache
+def get_dobby_config() -> DobbyConfigManager:
+    """Shared config manager, built lazily on first use
+
+    Importing the module no longer reads the environment; worker boot and
+    CLI invocations that never touch the API skip the setup entirely.
+    """
+    return DobbyConfigManager()
+
+
+@functools.cache
+def get_api() -> DobbyRealAPI:
+    """Shared API client; reuse this instead of constructing DobbyRealAPI
+
+    Per-call instances each open a fresh Session and connection pool,
+    which defeats keep-alive; the singleton keeps one warm pool (and one
+    analysis cache) for all call sites and threads.
+    """
+    return DobbyRealAPI(get_dobby_config().config)
 
 if __name__ == "__main__":
     # Test the real API integration
-    api = DobbyRealAPI()
+    api = get_api()
     
     test_queries = [
         "comfortable wireless headphones for long flights under 5000",
@@ -332,9 +515,8 @@ if __name__ == "__main__":
     ]
     
     print("=== Dobby API Integration Test ===")
-    print("API Status:", "Configured" if DOBBY_CONFIG.is_configured() else "Mock Mode")
+    print("API Status:", "Configured" if get_dobby_config().is_configured() else "Mock Mode")
     
-    for query in test_queries:
-        result = api.analyze_shopping_query(query)
+    for query, result in zip(test_queries, api.analyze_batch(test_queries)):
         print(f"\nQuery: {query}")
-        print(f"Analysis: {json.dumps(result, indent=2)}")
+        print(f"Analysis: {orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()}")
@@ -3,17 +3,91 @@ Fireworks AI Integration for ROMA Shopping Agent
 Qwen3-8B for natural language query simplification
 """
 
+import math
 import os
-import json
+import orjson
+import re
+import threading
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, Any, Optional
 from datetime import datetime
 
 
+# Result-cache bounds for simplified queries
+_CACHE_MAX_ENTRIES = 1024
+_CACHE_TTL = 3600
+
+# Strips markdown code fences around model JSON output in one pass
+_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```$', re.M)
+
+# Fields a structured conversion must carry to be usable downstream
+_REQUIRED_FIELDS = frozenset(['category', 'budget'])
+
+# System prompt and the static part of the user message are module constants
+# so every request sends a byte-identical prefix; providers with prompt
+# caching can then reuse the prefilled KV cache for the static portion,
+# leaving only the trailing query as new tokens.
+_SYSTEM_PROMPT = """
+You are ROMA's AI shopping assistant. Your job is to take complex natural language shopping queries and convert them into precise, structured data that ROMA can process.
+
+INPUT: Natural language shopping query from user
+OUTPUT: JSON with exact shopping parameters
+
+RULES:
+1. Always return valid JSON
+2. Be specific about categories and budgets
+3. Include brand preferences when mentioned
+4. Extract use cases from context
+5. Handle negations properly
+6. Convert vague terms to specific values
+
+EXAMPLE:
+Input: "comfortable wireless headphones for long flights under 5000"
+Output: {
+    "category": "electronics",
+    "subcategory": "wireless_headphones",
+    "budget": {"min": 0, "max": 5000, "currency": "INR"},
+    "specifications": ["wireless", "comfortable", "long_battery"],
+    "use_case": "travel",
+    "brand_preferences": {"include": [], "exclude": []},
+    "quality_level": "mid_range",
+    "confidence": 0.9
+}
+"""
+
+_USER_PROMPT_PREFIX = '''Convert the shopping query at the end to structured data.
+
+Return JSON with these exact fields:
+{
+    "category": "main product category",
+    "subcategory": "specific product type",
+    "budget": {
+        "min": minimum_price,
+        "max": maximum_price,
+        "currency": "INR"
+    },
+    "specifications": [list of required features],
+    "use_case": "intended usage scenario",
+    "brand_preferences": {
+        "include": [preferred brands],
+        "exclude": [brands to avoid]
+    },
+    "quality_level": "budget/mid_range/premium/luxury",
+    "color_preferences": [preferred colors],
+    "urgency": "immediate/soon/flexible",
+    "confidence": 0.0-1.0
+}
+
+Query: "'''
+
+
 class FireworksAIClient:
     """Production-ready Fireworks AI client for ROMA"""
-    
+
     def __init__(self, api_key: str = None):
         self.api_key = api_key or os.getenv('FIREWORKS_API_KEY')
         if not self.api_key:
@@ -21,80 +95,159 @@ class FireworksAIClient:
         self.base_url = "https://api.fireworks.ai/inference/v1/chat/completions"
         self.model = "accounts/fireworks/models/qwen3-8b"
         self.rate_limiter = RateLimiter(max_requests=10, window_seconds=60)
+
+        # Pooled keep-alive session: reuses TCP/TLS connections across calls
+        # and retries transient statuses at the adapter layer
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset(['POST'])
+            )
+        ))
+        self.session.headers.update({
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        })
+
+        # Bounded TTL cache keyed on the sorted token form of the query, so
+        # repeats and word-order paraphrases skip the LLM round-trip
+        self._cache = {}
         
-        # Shopping-specific system prompt
-        self.system_prompt = """
-        You are ROMA's AI shopping assistant. Your job is to take complex natural language shopping queries and convert them into precise, structured data that ROMA can process.
-        
-        INPUT: Natural language shopping query from user
-        OUTPUT: JSON with exact shopping parameters
-        
-        RULES:
-        1. Always return valid JSON
-        2. Be specific about categories and budgets
-        3. Include brand preferences when mentioned
-        4. Extract use cases from context
-        5. Handle negations properly
-        6. Convert vague terms to specific values
-        
-        EXAMPLE:
-        Input: "comfortable wireless headphones for long flights under 5000"
-        Output: {
-            "category": "electronics",
-            "subcategory": "wireless_headphones",
-            "budget": {"min": 0, "max": 5000, "currency": "INR"},
-            "specifications": ["wireless", "comfortable", "long_battery"],
-            "use_case": "travel",
-            "brand_preferences": {"include": [], "exclude": []},
-            "quality_level": "mid_range",
-            "confidence": 0.9
-        }
-        """
+        # Shopping-specific system prompt (shared constant, byte-identical
+        # across calls so the provider can cache the prefix)
+        self.system_prompt = _SYSTEM_PROMPT
     
     def simplify_shopping_query(self, query: str) -> Dict[str, Any]:
         """Convert natural language query to structured shopping data"""
-        
+
+        # Cache first so hits never consume rate-limit budget
+        cache_key = ' '.join(sorted(query.lower().split()))
+        entry = self._cache.get(cache_key)
+        if entry is not None:
+            expires_at, cached = entry
+            if time.time() < expires_at:
+                return cached
+            del self._cache[cache_key]
+
         # Check rate limit
         if not self.rate_limiter.allow_request():
             return self._rate_limit_response()
-        
+
         # Build optimized prompt
         prompt = self._build_shopping_prompt(query)
-        
+
         # Make API call
-        return self._call_fireworks_api(prompt, query)
+        result = self._call_fireworks_api(prompt, query)
+
+        if result.get('success'):
+            if len(self._cache) >= _CACHE_MAX_ENTRIES:
+                # Simple reset keeps the cache bounded without per-call cleanup
+                self._cache.clear()
+            self._cache[cache_key] = (time.time() + _CACHE_TTL, result)
+
+        return result
     
+    def simplify_shopping_queries(self, queries: list) -> list:
+        """Convert several queries in one API call (row-marshaling)
+
+        The ~400-token system prompt is paid once per batch instead of per
+        query, and one request replaces N against the RPM cap. The model is
+        asked for a JSON array which is demultiplexed back into per-query
+        results; on parse failure every query falls back individually.
+        """
+
+        if not queries:
+            return []
+        if len(queries) == 1:
+            return [self.simplify_shopping_query(queries[0])]
+
+        if not self.rate_limiter.allow_request():
+            return [self._rate_limit_response() for _ in queries]
+
+        numbered = '\n'.join(f'{i + 1}) "{q}"' for i, q in enumerate(queries))
+        prompt = (
+            "Convert each of these shopping queries to structured data:\n"
+            f"{numbered}\n\n"
+            "Return a JSON array with one object per query, in order, using "
+            "the same fields as a single-query conversion."
+        )
+
+        payload = {
+            "model": self.model,
+            "max_tokens": 512 * len(queries),
+            "top_p": 1,
+            "top_k": 40,
+            "presence_penalty": 0,
+            "frequency_penalty": 0,
+            "temperature": 0.1,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt}
+            ]
+        }
+
+        try:
+            response = self.session.post(self.base_url, json=payload, timeout=(3.05, 30))
+            response.raise_for_status()
+            content = orjson.loads(response.content).get('choices', [{}])[0].get('message', {}).get('content', '')
+            parsed = orjson.loads(self._strip_fences(content))
+            if not isinstance(parsed, list) or len(parsed) != len(queries):
+                raise ValueError("batch response shape mismatch")
+        except Exception as e:
+            return [self._fallback_response(q, str(e)) for q in queries]
+
+        timestamp = datetime.now().isoformat()
+        return [
+            {**item, "original_query": query, "ai_engine": "fireworks_qwen3",
+             "timestamp": timestamp, "success": True}
+            for query, item in zip(queries, parsed)
+        ]
+
+    @staticmethod
+    def _strip_fences(content: str) -> str:
+        """Remove markdown code fences around model JSON output"""
+        return _FENCE_RE.sub('', content).strip()
+
+    @classmethod
+    def _loads_tolerant(cls, content: str):
+        """Parse model output, salvaging JSON wrapped in stray prose
+
+        If the fenced-stripped content fails to parse, retry on the slice
+        between the first '{' and the last '}' so a marginal completion
+        does not cost the whole call.
+        """
+        stripped = cls._strip_fences(content)
+        try:
+            return orjson.loads(stripped)
+        except orjson.JSONDecodeError:
+            start = stripped.find('{')
+            end = stripped.rfind('}')
+            if start == -1 or end <= start:
+                raise
+            return orjson.loads(stripped[start:end + 1])
+
     def _build_shopping_prompt(self, query: str) -> str:
-        """Build shopping-optimized prompt"""
-        return f"""
-        Convert this shopping query to structured data:
-        "{query}"
-        
-        Return JSON with these exact fields:
-        {{
-            "category": "main product category",
-            "subcategory": "specific product type",
-            "budget": {{
-                "min": minimum_price,
-                "max": maximum_price,
-                "currency": "INR"
-            }},
-            "specifications": [list of required features],
-            "use_case": "intended usage scenario",
-            "brand_preferences": {{
-                "include": [preferred brands],
-                "exclude": [brands to avoid]
-            }},
-            "quality_level": "budget/mid_range/premium/luxury",
-            "color_preferences": [preferred colors],
-            "urgency": "immediate/soon/flexible",
-            "confidence": 0.0-1.0
-        }}
+        """Build shopping-optimized prompt
+
+        The query is appended after the static instructions so everything
+        before it is a stable, cacheable prefix.
         """
+        return _USER_PROMPT_PREFIX + query + '"'
     
     def _call_fireworks_api(self, prompt: str, original_query: str) -> Dict[str, Any]:
-        """Make actual API call to Fireworks"""
-        
+        """Make actual API call to Fireworks
+
+        The completion is streamed and the connection is closed as soon as
+        the first top-level JSON object is complete, so verbose completions
+        do not add tail latency or wasted tokens.
+        """
+
         payload = {
             "model": self.model,
             "max_tokens": 512,
@@ -103,6 +256,7 @@ class FireworksAIClient:
             "presence_penalty": 0,
             "frequency_penalty": 0,
             "temperature": 0.1,
+            "stream": True,
             "messages": [
                 {
                     "role": "system",
@@ -114,42 +268,88 @@ class FireworksAIClient:
                 }
             ]
         }
-        
-        headers = {
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
+
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.base_url,
-                headers=headers,
                 json=payload,
-                timeout=30
+                timeout=(3.05, 30),
+                stream=True
             )
             response.raise_for_status()
-            
-            return self._parse_fireworks_response(response.json(), original_query)
-            
+
+            content = self._collect_streamed_content(response)
+            return self._parse_content(content, original_query)
+
         except Exception as e:
             return self._fallback_response(original_query, str(e))
+
+    @staticmethod
+    def _collect_streamed_content(response) -> str:
+        """Accumulate SSE content deltas, stopping at the end of the JSON
+
+        A brace-depth counter (string-aware, so braces inside JSON strings
+        do not count) detects when the first top-level object closes; the
+        stream is closed there instead of waiting out the full completion.
+        """
+        parts = []
+        depth = 0
+        started = False
+        in_string = False
+        escaped = False
+
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    break
+                try:
+                    delta = orjson.loads(data).get('choices', [{}])[0].get('delta', {}).get('content', '')
+                except orjson.JSONDecodeError:
+                    continue
+                if not delta:
+                    continue
+
+                parts.append(delta)
+                for ch in delta:
+                    if in_string:
+                        if escaped:
+                            escaped = False
+                        elif ch == '\\':
+                            escaped = True
+                        elif ch == '"':
+                            in_string = False
+                    elif ch == '"':
+                        in_string = True
+                    elif ch == '{':
+                        depth += 1
+                        started = True
+                    elif ch == '}':
+                        depth -= 1
+                if started and depth <= 0:
+                    break
+        finally:
+            response.close()
+
+        return ''.join(parts)
     
     def _parse_fireworks_response(self, response: Dict[str, Any], original_query: str) -> Dict[str, Any]:
-        """Parse Fireworks response into structured data"""
+        """Parse a non-streamed Fireworks response into structured data"""
+        content = response.get('choices', [{}])[0].get('message', {}).get('content', '')
+        return self._parse_content(content, original_query)
+
+    def _parse_content(self, content: str, original_query: str) -> Dict[str, Any]:
+        """Parse completion content into structured data"""
         try:
-            content = response.get('choices', [{}])[0].get('message', {}).get('content', '')
-            
-            # Clean and parse JSON
-            cleaned = content.strip()
-            if cleaned.startswith('```json'):
-                cleaned = cleaned[7:]
-            if cleaned.endswith('```'):
-                cleaned = cleaned[:-3]
-            
-            parsed = json.loads(cleaned)
-            
+            # Clean and parse JSON, salvaging objects wrapped in prose
+            parsed = self._loads_tolerant(content)
+
             # Ensure all required fields
+            if not isinstance(parsed, dict) or not _REQUIRED_FIELDS <= parsed.keys():
+                return self._fallback_response(original_query, "Incomplete response schema")
+
             return {
                 **parsed,
                 "original_query": original_query,
@@ -158,7 +358,7 @@ class FireworksAIClient:
                 "success": True
             }
             
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             return self._fallback_response(original_query, "Invalid JSON response")
     
     def _fallback_response(self, query: str, error: str = None) -> Dict[str, Any]:
@@ -190,33 +390,39 @@ class FireworksAIClient:
 
 
 class RateLimiter:
-    """Simple rate limiter for API calls"""
-    
+    """GCRA rate limiter for API calls
+
+    Tracks a single theoretical-arrival-time float instead of per-request
+    timestamps, so both the allow check and memory use are O(1) no matter
+    how bursty the traffic is.
+    """
+
     def __init__(self, max_requests: int = 10, window_seconds: int = 60):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests = []
-    
+        self._period = window_seconds / max_requests
+        self._tat = 0.0
+        self._lock = threading.Lock()
+
     def allow_request(self) -> bool:
-        """Check if request is allowed"""
+        """Check if request is allowed (safe under concurrent callers)"""
         now = time.time()
-        
-        # Remove old requests
-        self.requests = [req_time for req_time in self.requests if now - req_time < self.window_seconds]
-        
-        if len(self.requests) < self.max_requests:
-            self.requests.append(now)
-            return True
-        
+
+        with self._lock:
+            tat = max(self._tat, now)
+            new_tat = tat + self._period
+            if new_tat - now <= self.window_seconds:
+                self._tat = new_tat
+                return True
+
         return False
-    
+
     def get_retry_after(self) -> int:
         """Get retry after time in seconds"""
-        if not self.requests:
-            return 0
-        
-        oldest_request = min(self.requests)
-        return max(0, int(self.window_seconds - (time.time() - oldest_request)))
+        now = time.time()
+        with self._lock:
+            wait = self._tat + self._period - self.window_seconds - now
+        return max(0, math.ceil(wait))
 
 
 # Production-ready client
@@ -229,7 +435,21 @@ class ROMAFireworksClient:
     def process_shopping_query(self, query: str) -> Dict[str, Any]:
         """Main entry point for query processing"""
         return self.fireworks.simplify_shopping_query(query)
-    
+
+    def process_shopping_queries_batch(self, queries: list) -> list:
+        """Process several queries concurrently over the shared session
+
+        The workload is network-bound, so a small thread pool overlaps the
+        API round-trips; results come back in input order.
+        """
+        if not queries:
+            return []
+        with ThreadPoolExecutor(
+            max_workers=min(8, len(queries)),
+            thread_name_prefix='fireworks'
+        ) as pool:
+            return list(pool.map(self.process_shopping_query, queries))
+
     def test_connection(self) -> bool:
         """Test API connection"""
         try:
@@ -254,7 +474,6 @@ if __name__ == "__main__":
     
     print("=== Fireworks AI Shopping Query Processing ===")
     
-    for query in test_queries:
-        result = client.process_shopping_query(query)
+    for query, result in zip(test_queries, client.process_shopping_queries_batch(test_queries)):
         print(f"\n🎯 Query: {query}")
-        print(f"📊 Analysis: {json.dumps(result, indent=2, ensure_ascii=False)}")
+        print(f"📊 Analysis: {orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()}")
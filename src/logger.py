@@ -6,36 +6,53 @@ import logging
 import sys
 from typing import Optional
 
+import orjson
+
+
+class JsonFormatter(logging.Formatter):
+    """Serialize records as JSON lines with orjson
+
+    Emits the raw record.created timestamp instead of formatting asctime,
+    so each log line skips the strftime call and %-formatting while
+    staying machine-parseable downstream.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": record.created,
+            "lvl": record.levelname,
+            "name": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode()
+
 
 def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
     """
     Setup structured logger with console output
-    
+
     Args:
         name: Logger name (usually __name__)
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-    
+
     Returns:
         Configured logger instance
     """
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    
+
     # Prevent duplicate handlers
     if logger.handlers:
         return logger
-    
+
     # Console handler
     handler = logging.StreamHandler(sys.stdout)
     handler.setLevel(level)
-    
-    # Formatter with timestamp
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    handler.setFormatter(formatter)
-    
+
+    handler.setFormatter(JsonFormatter())
+
     logger.addHandler(handler)
     return logger
 
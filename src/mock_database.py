@@ -1,17 +1,61 @@
+import bisect
+import heapq
 import json
+import re
+from operator import itemgetter
 from typing import List, Dict, Any
 import os
 
+# Negated brands in a query ("non-apple laptops") become exclusions
+_NEGATION_RE = re.compile(r'non-(\w+)')
+
 
 class MockProductDatabase:
     """Mock product database for testing shopping queries"""
     
-    def __init__(self, data_file: str = None):
-        if data_file is None:
-            data_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'mock_products.json')
-        
-        self.products = self._load_mock_data(data_file)
-    
+    def __init__(self, data_file: str = None, products: List[Dict[str, Any]] = None):
+        if products is None:
+            if data_file is None:
+                data_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'mock_products.json')
+            products = self._load_mock_data(data_file)
+
+        self.products = products
+        self._search_rows = [self._make_search_row(p) for p in self.products]
+        # Inverted indexes for the exact-match filters plus a price-sorted
+        # view, so searches only scan candidate rows instead of the whole
+        # catalog
+        self._category_index = {}
+        self._platform_index = {}
+        for i, row in enumerate(self._search_rows):
+            self._category_index.setdefault(row[0], set()).add(i)
+            self._platform_index.setdefault(row[4], set()).add(i)
+        price_pairs = sorted((row[1], i) for i, row in enumerate(self._search_rows))
+        self._sorted_prices = [price for price, _ in price_pairs]
+        self._price_order = [i for _, i in price_pairs]
+
+    @staticmethod
+    def _make_search_row(product: Dict[str, Any]) -> tuple:
+        """Precompute the lowercased fields search_products filters on
+
+        Columnar row built once per product, so queries avoid re-lowering
+        every field on every call. The query-matchable fields are fused
+        into one searchable string so each query word needs a single
+        substring scan instead of one per field.
+        """
+        searchable = (
+            f"{product['name']} {product['description']} {product['category']} "
+            f"{product['brand']} {product['color']}"
+        ).lower()
+        return (
+            product['category'],
+            product['price'],
+            product['brand'].lower(),
+            product['color'].lower(),
+            product['platform'].lower(),
+            searchable,
+            product
+        )
+
     def _load_mock_data(self, data_file: str) -> List[Dict[str, Any]]:
         """Load mock product data from JSON file"""
         try:
@@ -33,46 +77,68 @@ class MockProductDatabase:
                 }
             ]
     
-    def search_products(self, query: str = None, category: str = None, 
-                       max_price: int = None, brand: str = None, 
-                       color: str = None, platform: str = None) -> List[Dict[str, Any]]:
-        """Search products based on various criteria"""
-        
-        filtered_products = self.products
+    def search_products(self, query: str = None, category: str = None,
+                       max_price: int = None, brand: str = None,
+                       color: str = None, platform: str = None,
+                       limit: int = None) -> List[Dict[str, Any]]:
+        """Search products based on various criteria
+
+        When `limit` is given only the top matches are selected, which is
+        cheaper than sorting everything for callers that paginate.
+        """
         
+        # Normalize the criteria once; one fused pass over the precomputed
+        # rows replaces per-filter intermediate lists and per-product .lower()
+        brand_lc = brand.lower() if brand else None
+        color_lc = color.lower() if color else None
+        platform_lc = platform.lower() if platform else None
+        query_lc = query.lower() if query else None
+        exclude_brands = set(_NEGATION_RE.findall(query_lc)) if query_lc else set()
+        query_words = [
+            word for word in query_lc.split() if not word.startswith('non-')
+        ] if query_lc else None
+
+        # Exact filters resolve through the inverted indexes; only the
+        # intersected candidates reach the scan below
+        candidate_sets = []
         if category:
-            filtered_products = [p for p in filtered_products if p['category'] == category]
-        
+            candidate_sets.append(self._category_index.get(category, set()))
+        if platform_lc:
+            candidate_sets.append(self._platform_index.get(platform_lc, set()))
         if max_price:
-            filtered_products = [p for p in filtered_products if p['price'] <= max_price]
-        
-        if brand:
-            filtered_products = [p for p in filtered_products if brand.lower() in p['brand'].lower()]
-        
-        if color:
-            filtered_products = [p for p in filtered_products if color.lower() in p['color'].lower()]
-        
-        if platform:
-            filtered_products = [p for p in filtered_products if p['platform'].lower() == platform.lower()]
-        
-        if query:
-            query_words = query.lower().split()
-            filtered_products = [
-                p for p in filtered_products 
-                if any(word in p['name'].lower() or 
-                      word in p['description'].lower() or
-                      word in p['category'].lower() or
-                      word in p['brand'].lower() or
-                      word in p['color'].lower()
-                      for word in query_words)
-            ]
-        
-        if query and 'non-apple' in query.lower():
-            filtered_products = [p for p in filtered_products if 'apple' not in p['brand'].lower()]
-        
-        filtered_products.sort(key=lambda x: (-x['rating'], x['price']))
-        
-        return filtered_products
+            hi = bisect.bisect_right(self._sorted_prices, max_price)
+            candidate_sets.append(set(self._price_order[:hi]))
+
+        if candidate_sets:
+            candidates = sorted(set.intersection(*candidate_sets))
+        else:
+            candidates = range(len(self._search_rows))
+
+        filtered_products = []
+        for i in candidates:
+            _, _, b_lc, c_lc, _, searchable, product = self._search_rows[i]
+            if brand_lc and brand_lc not in b_lc:
+                continue
+            if color_lc and color_lc not in c_lc:
+                continue
+            if query_words and not any(word in searchable for word in query_words):
+                continue
+            if exclude_brands and any(excluded in b_lc for excluded in exclude_brands):
+                continue
+            filtered_products.append(product)
+
+        # Decorate-sort-undecorate: plain tuple comparison stays in C,
+        # avoiding a key-lambda call per element (index breaks ties so the
+        # product dicts are never compared)
+        decorated = [
+            (-product['rating'], product['price'], i, product)
+            for i, product in enumerate(filtered_products)
+        ]
+        if limit is not None:
+            return [entry[3] for entry in heapq.nsmallest(limit, decorated)]
+
+        decorated.sort()
+        return [entry[3] for entry in decorated]
     
     def get_product_by_id(self, product_id: int) -> Dict[str, Any]:
         """Get a specific product by ID (index)"""
@@ -110,7 +176,15 @@ class MockProductDatabase:
     
     def add_product(self, product: Dict[str, Any]):
         """Add a new product to mock database"""
+        i = len(self.products)
         self.products.append(product)
+        row = self._make_search_row(product)
+        self._search_rows.append(row)
+        self._category_index.setdefault(row[0], set()).add(i)
+        self._platform_index.setdefault(row[4], set()).add(i)
+        pos = bisect.bisect_right(self._sorted_prices, row[1])
+        self._sorted_prices.insert(pos, row[1])
+        self._price_order.insert(pos, i)
     
     def get_top_rated(self, category: str = None, limit: int = 3) -> List[Dict[str, Any]]:
         """Get top rated products"""
@@ -118,7 +192,7 @@ class MockProductDatabase:
         if category:
             products = [p for p in products if p['category'] == category]
         
-        return sorted(products, key=lambda x: x['rating'], reverse=True)[:limit]
+        return heapq.nlargest(limit, products, key=itemgetter('rating'))
 
 
 if __name__ == "__main__":
@@ -3,29 +3,59 @@ Real Database Integration - Using comprehensive_products.json
 Loads and searches from actual comprehensive product database
 """
 
-import json
+import bisect
+import functools
+import heapq
 import os
+import re
+import sys
 from typing import List, Dict, Any
 
+import orjson
+
+_TOKEN_RE = re.compile(r'\w+')
+
+# Fields with equality filters in search_products; each gets a value→indices
+# set index so filtering is hash intersection instead of a full scan
+_EQUALITY_FIELDS = ('category', 'brand', 'color', 'platform')
+
+
+def _intern_fields(products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Intern the heavily repeated string fields
+
+    Catalog rows share a handful of category/brand/platform/color values;
+    interning deduplicates them and makes equality checks pointer
+    comparisons during index builds.
+    """
+    for product in products:
+        for field in _EQUALITY_FIELDS:
+            value = product.get(field)
+            if isinstance(value, str):
+                product[field] = sys.intern(value)
+    return products
+
 
 class RealProductDatabase:
     """Actual product database using comprehensive_products.json"""
-    
+
     def __init__(self):
         self.products = self._load_products()
         self.categories = self._build_category_index()
         self.brands = self._build_brand_index()
+        self._eq_indexes = self._build_equality_indexes()
+        self._price_index = self._build_price_index()
+        self._keyword_index = self._build_keyword_index()
     
     def _load_products(self) -> List[Dict[str, Any]]:
         """Load products from comprehensive_products.json"""
         try:
             db_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'comprehensive_products.json')
-            with open(db_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(db_path, 'rb') as f:
+                return _intern_fields(orjson.loads(f.read()))
         except FileNotFoundError:
             print(f"Warning: comprehensive_products.json not found at {db_path}")
             return self._fallback_products()
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             print(f"Error loading JSON: {e}")
             return self._fallback_products()
     
@@ -66,47 +96,96 @@ class RealProductDatabase:
             brands[brand].append(product)
         return brands
     
-    def search_products(self, 
+    def _build_equality_indexes(self) -> Dict[str, Dict[str, set]]:
+        """Build lowercased value→product-index sets for equality filters"""
+        indexes = {field: {} for field in _EQUALITY_FIELDS}
+        for i, product in enumerate(self.products):
+            for field, index in indexes.items():
+                value = str(product.get(field, '')).lower()
+                index.setdefault(value, set()).add(i)
+        return indexes
+
+    def _build_price_index(self) -> Dict[str, tuple]:
+        """Build price-sorted index lists, per category and overall
+
+        Each entry is (sorted prices, parallel product indices) so price
+        bounds resolve to an index slice via bisect.
+        """
+        pairs_by_cat = {None: []}
+        for i, product in enumerate(self.products):
+            pair = (product.get('price', 0), i)
+            pairs_by_cat[None].append(pair)
+            pairs_by_cat.setdefault(product.get('category', '').lower(), []).append(pair)
+
+        return {
+            cat: ([price for price, _ in pairs], [i for _, i in pairs])
+            for cat, pairs in ((c, sorted(p)) for c, p in pairs_by_cat.items())
+        }
+
+    def search_products(self,
                        category: str = None,
                        min_price: int = None,
                        max_price: int = None,
                        brand: str = None,
                        color: str = None,
-                       platform: str = None) -> List[Dict[str, Any]]:
-        """Search products with filters"""
-        
-        results = self.products
-        
-        # Apply filters
-        if category:
-            results = [p for p in results if p.get('category', '').lower() == category.lower()]
-        
-        if min_price is not None:
-            results = [p for p in results if p.get('price', 0) >= min_price]
-        
-        if max_price is not None:
-            results = [p for p in results if p.get('price', 0) <= max_price]
-        
-        if brand:
-            results = [p for p in results if p.get('brand', '').lower() == brand.lower()]
-        
-        if color:
-            results = [p for p in results if p.get('color', '').lower() == color.lower()]
-        
-        if platform:
-            results = [p for p in results if p.get('platform', '').lower() == platform.lower()]
-        
-        # Sort by rating and price
-        return sorted(results, key=lambda x: (-x.get('rating', 0), x.get('price', 0)))
-    
+                       platform: str = None,
+                       limit: int = None) -> List[Dict[str, Any]]:
+        """Search products with filters
+
+        Each filter resolves to a precomputed index set; the candidate set
+        is their intersection, so work scales with the matches rather than
+        with the catalog size. A `limit` selects the top matches with a
+        heap instead of sorting everything.
+        """
+
+        candidate_sets = []
+        for field, value in (('category', category), ('brand', brand),
+                             ('color', color), ('platform', platform)):
+            if value:
+                candidate_sets.append(self._eq_indexes[field].get(value.lower(), set()))
+
+        if min_price is not None or max_price is not None:
+            prices, indices = self._price_index.get(
+                category.lower() if category else None, ([], [])
+            )
+            lo = 0 if min_price is None else bisect.bisect_left(prices, min_price)
+            hi = len(prices) if max_price is None else bisect.bisect_right(prices, max_price)
+            candidate_sets.append(set(indices[lo:hi]))
+
+        if candidate_sets:
+            matched = set.intersection(*candidate_sets)
+            results = [self.products[i] for i in matched]
+        else:
+            results = list(self.products)
+
+        # Sort by rating and price via decorate-sort-undecorate: plain
+        # tuple comparison stays in C, with the index as a tie-breaker so
+        # product dicts are never compared
+        decorated = [
+            (-product.get('rating', 0), product.get('price', 0), i, product)
+            for i, product in enumerate(results)
+        ]
+        if limit is not None:
+            return [entry[3] for entry in heapq.nsmallest(limit, decorated)]
+
+        decorated.sort()
+        return [entry[3] for entry in decorated]
+    
+    def _build_keyword_index(self) -> Dict[str, set]:
+        """Build an inverted token→product-index map over name + description"""
+        index = {}
+        for i, product in enumerate(self.products):
+            text = f"{product.get('name', '')} {product.get('description', '')}".lower()
+            for token in _TOKEN_RE.findall(text):
+                index.setdefault(token, set()).add(i)
+        return index
+
     def search_by_keywords(self, keywords: List[str]) -> List[Dict[str, Any]]:
-        """Search products by keywords"""
-        results = []
-        for product in self.products:
-            search_text = f"{product.get('name', '')} {product.get('description', '')}".lower()
-            if any(keyword.lower() in search_text for keyword in keywords):
-                results.append(product)
-        return results
+        """Search products by keywords via the inverted index"""
+        matched = set().union(
+            *(self._keyword_index.get(keyword.lower(), ()) for keyword in keywords)
+        ) if keywords else set()
+        return [self.products[i] for i in sorted(matched)]
     
     def get_categories(self) -> List[str]:
         """Get all available categories"""
@@ -134,12 +213,14 @@ class RealProductDatabase:
         return counts
 
 
-# Global database instance
-REAL_DB = RealProductDatabase()
+@functools.cache
+def get_real_db() -> RealProductDatabase:
+    """Shared database instance, loaded on first use"""
+    return RealProductDatabase()
 
 # Test the database
 if __name__ == "__main__":
-    db = RealProductDatabase()
+    db = get_real_db()
     
     print("=== Real Database Test ===")
     print(f"Total products: {len(db.products)}")
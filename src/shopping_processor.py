@@ -1,3 +1,8 @@
+import bisect
+import copy
+import functools
+import heapq
+import re
 from typing import List, Dict, Any
 from .budget_analyzer import BudgetAnalyzer
 from .mock_database import MockProductDatabase
@@ -6,50 +11,127 @@ from .logger import setup_logger
 
 logger = setup_logger(__name__)
 
+_WS_RE = re.compile(r'\s+')
+_TOKEN_RE = re.compile(r'\w+')
+
 
 class ShoppingQueryProcessor:
     """Main processor for shopping queries using budget analysis and mock database"""
     
-    def __init__(self):
+    def __init__(self, database: MockProductDatabase = None):
         self.budget_analyzer = BudgetAnalyzer()
-        self.database = MockProductDatabase()
-    
+        self.database = database if database is not None else MockProductDatabase()
+        self._suggestion_terms = self._build_suggestion_terms()
+        # Struct-of-arrays style score rows: the per-product strings used
+        # by _filter_and_rank, lowercased once at construction instead of
+        # per query
+        self._score_rows = {
+            id(product): self._make_score_row(product)
+            for product in self.database.products
+        }
+        # The pipeline is deterministic against the static catalog, so
+        # repeat queries are served from a per-instance memo
+        self._cached_process = functools.lru_cache(maxsize=1024)(self._process_query_uncached)
+        # The metadata views are likewise static; memoize the catalog
+        # scans and hand callers fresh lists
+        self._cached_categories = functools.cache(self.database.get_categories)
+        self._cached_brands = functools.cache(self.database.get_brands)
+
+    @staticmethod
+    def _make_score_row(product: Dict[str, Any]) -> tuple:
+        """Precompute the lowercased fields _filter_and_rank scores on"""
+        searchable = (
+            f"{product['name']} {product['description']} "
+            f"{product['brand']} {product['color']}"
+        ).lower()
+        return (
+            frozenset(_TOKEN_RE.findall(searchable)),
+            product['brand'].lower(),
+            product['color'].lower(),
+            product['price'],
+            product['rating'],
+            product['category'],
+        )
+
+    def _build_suggestion_terms(self) -> List[str]:
+        """Build the sorted vocabulary used for prefix completions
+
+        Sorted list + bisect gives O(log N) prefix lookup over categories,
+        brands and category keywords, built once at construction.
+        """
+        terms = set(self.database.get_categories())
+        terms.update(self.database.get_brands())
+        for keywords in self.budget_analyzer.CATEGORY_KEYWORDS.values():
+            terms.update(keywords)
+        return sorted(term.lower() for term in terms)
+
+    def get_completions(self, prefix: str, limit: int = 10) -> List[str]:
+        """Get prefix completions from the precomputed vocabulary"""
+        prefix = prefix.lower().strip()
+        if not prefix:
+            return []
+
+        completions = []
+        start = bisect.bisect_left(self._suggestion_terms, prefix)
+        for term in self._suggestion_terms[start:]:
+            if not term.startswith(prefix) or len(completions) >= limit:
+                break
+            completions.append(term)
+        return completions
+
     def process_query(self, user_query: str) -> Dict[str, Any]:
-        """Process a shopping query and return curated results"""
-        
+        """Process a shopping query and return curated results
+
+        Results are cached on the normalized query; callers get a deep
+        copy so cached entries stay pristine if the response is mutated.
+        """
+        normalized = _WS_RE.sub(' ', user_query).strip().lower()
+
+        before = self._cached_process.cache_info().hits
+        result = copy.deepcopy(self._cached_process(normalized))
+        if self._cached_process.cache_info().hits > before:
+            logger.debug("Cache hit for query: %s", normalized)
+
+        result['query'] = user_query
+        return result
+
+    def _process_query_uncached(self, user_query: str) -> Dict[str, Any]:
+        """Run the full analysis/search/rank pipeline"""
+
         try:
-            logger.info(f"Processing query: {user_query}")
+            logger.info("Processing query: %s", user_query)
             
             analysis = self.budget_analyzer.analyze_budget(user_query)
-            logger.debug(f"Analysis result: {analysis}")
+            logger.debug("Analysis result: %s", analysis)
             
             search_results = self.database.search_products(
                 query=user_query,
                 category=analysis['category'],
                 max_price=analysis['max_budget']
             )
-            logger.debug(f"Found {len(search_results)} products")
+            logger.debug("Found %d products", len(search_results))
             
             filtered_results = self._filter_and_rank(
-                search_results, 
-                user_query, 
-                analysis
+                search_results,
+                user_query,
+                analysis,
+                limit=3
             )
             response = {
                 'success': True,
                 'query': user_query,
                 'analysis': analysis,
-                'products': filtered_results[:3],  # Top 3 results
+                'products': filtered_results,  # Top 3 results
                 'total_found': len(search_results),
                 'category': analysis['category'],
                 'max_budget': analysis['max_budget']
             }
             
-            logger.info(f"Query processed successfully: {len(response['products'])} results returned")
+            logger.info("Query processed successfully: %d results returned", len(response['products']))
             return response
             
         except Exception as e:
-            logger.error(f"Query processing failed: {str(e)}", exc_info=True)
+            logger.error("Query processing failed: %s", e, exc_info=True)
             return {
                 'success': False,
                 'error': str(e),
@@ -57,48 +139,57 @@ class ShoppingQueryProcessor:
                 'products': []
             }
     
-    def _filter_and_rank(self, products: List[Dict], query: str, analysis: Dict) -> List[Dict]:
-        """Advanced filtering and ranking of products"""
-        
+    def _filter_and_rank(self, products: List[Dict], query: str, analysis: Dict,
+                         limit: int = None) -> List[Dict]:
+        """Advanced filtering and ranking of products
+
+        Query invariants (keywords, colors mentioned, budget reciprocal)
+        are computed once, and per-product strings come from the
+        precomputed score rows, so the loop body is pure arithmetic and
+        substring checks rather than repeated lowering and formatting.
+        A `limit` selects the top entries with a heap instead of sorting
+        everything.
+        """
+
         if not products:
             return []
-        
+
         query_lower = query.lower()
+        query_tokens = frozenset(_TOKEN_RE.findall(query_lower))
+        query_colors = [color for color in COLOR_KEYWORDS if color in query_lower]
+        max_budget = analysis['max_budget']
+        inv_budget = 1.0 / max_budget if max_budget else None
+        category = analysis['category']
+
+        score_rows = self._score_rows
         scored_products = []
-        
-        for product in products:
-            score = 0
-            product_text = f"{product['name']} {product['description']} {product['brand']} {product['color']}".lower()
-            
-            keywords = query_lower.split()
-            for keyword in keywords:
-                if keyword in product_text:
-                    score += 2
-            
-            for color in COLOR_KEYWORDS:
-                if color in query_lower and color in product['color'].lower():
-                    score += 3
-            
-            brand_lower = product['brand'].lower()
-            if brand_lower in query_lower:
-                score += 2
-            
-            if analysis['max_budget']:
-                price_ratio = product['price'] / analysis['max_budget']
-                if price_ratio <= 1.0:
-                    score += (1.0 - price_ratio) * 2
-                else:
-                    score -= 5
-            
-            score += product['rating'] * 1.5
-            
-            if analysis['category'] and product['category'] == analysis['category']:
-                score += 1
-            
-            scored_products.append((score, product))
-        scored_products.sort(key=lambda x: x[0], reverse=True)
-        
-        return [product for score, product in scored_products]
+
+        for i, product in enumerate(products):
+            row = score_rows.get(id(product))
+            if row is None:
+                row = score_rows[id(product)] = self._make_score_row(product)
+            tokens, brand_lc, color_lc, price, rating, product_category = row
+
+            # One fused scoring expression keeps the kernel branch-light;
+            # keyword hits are one C-level set intersection
+            score = (
+                rating * 1.5
+                + 2 * len(query_tokens & tokens)
+                + 3 * sum(color in color_lc for color in query_colors)
+                + (2 if brand_lc in query_lower else 0)
+                + (1 if product_category == category else 0)
+            )
+            if inv_budget is not None:
+                price_ratio = price * inv_budget
+                score += (1.0 - price_ratio) * 2 if price_ratio <= 1.0 else -5
+
+            scored_products.append((-score, i, product))
+
+        if limit is not None:
+            return [product for _, _, product in heapq.nsmallest(limit, scored_products)]
+
+        scored_products.sort()
+        return [product for _, _, product in scored_products]
     
     def get_suggestions(self, query: str) -> Dict[str, Any]:
         """Get search suggestions and category recommendations"""
@@ -107,6 +198,7 @@ class ShoppingQueryProcessor:
         
         suggestions = {
             'categories': [],
+            'completions': self.get_completions(query),
             'price_range': None,
             'popular_brands': [],
             'sample_products': []
@@ -131,11 +223,11 @@ class ShoppingQueryProcessor:
     
     def get_categories(self) -> List[str]:
         """Get available product categories"""
-        return self.database.get_categories()
-    
+        return list(self._cached_categories())
+
     def get_brands(self) -> List[str]:
         """Get available brands"""
-        return self.database.get_brands()
+        return list(self._cached_brands())
 
 
 if __name__ == "__main__":
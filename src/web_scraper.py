@@ -3,13 +3,125 @@ Web Scraping Module for Amazon and Flipkart
 Generates proper URLs and scrapes real-time product data
 """
 
+import copy
+import functools
+import heapq
+import itertools
 import re
-import json
-import time
+import string
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
-from urllib.request import Request, urlopen
-from urllib.error import URLError, HTTPError
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Shared pool for fanning out per-platform scrapes; latency becomes
+# max(platforms) instead of sum(platforms)
+_SCRAPE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='scrape')
+
+# Patterns compiled once at import and fused into single alternations so
+# each extraction scans the text once instead of once per variant
+_CLEAN_RE = re.compile(r'[^\w\s-]')
+
+# Deletion table dropping ASCII chars outside the URL query whitelist;
+# a C-level translate replaces the regex for the common ASCII case
+_ALLOWED_CHARS = frozenset(string.ascii_lowercase + string.digits + string.whitespace + '-_')
+_CLEAN_TRANS = str.maketrans(
+    '', '', ''.join(chr(c) for c in range(128) if chr(c) not in _ALLOWED_CHARS)
+)
+_PRICE_RE = re.compile(
+    r'₹\s*(?P<rupee>\d+(?:,\d+)*)'
+    r'|Rs\.\s*(?P<rs>\d+(?:,\d+)*)'
+    r'|(?P<suffix>\d+(?:,\d+)*)\s*₹'
+    r'|\$(?P<dollar>\d+(?:\.\d+)*)'
+)
+_RATING_RE = re.compile(
+    r'(?P<of5>\d+\.?\d*)\s*out of\s*5'
+    r'|(?P<stars>\d+\.?\d*)\s*stars?'
+    r'|Rating:\s*(?P<label>\d+\.?\d*)'
+)
+
+
+# Mock catalogs are static; built once at import with the lowercased
+# name+description search text precomputed alongside each product
+_AMAZON_MOCKS = (
+    {
+        "name": "Levi's Men's Denim Jacket",
+        "price": 1899,
+        "rating": 4.3,
+        "image_url": "https://via.placeholder.com/300x200/0000ff/ffffff?text=Levi's+Denim",
+        "description": "Classic denim jacket with button closure, regular fit",
+        "buy_link": "https://www.amazon.in/Levis-Mens-Denim-Jacket/dp/B08XYZ123",
+        "category": "apparel",
+        "brand": "Levi's",
+        "color": "blue",
+        "platform": "Amazon"
+    },
+    {
+        "name": "Wrangler Men's Denim Jacket",
+        "price": 1599,
+        "rating": 4.1,
+        "image_url": "https://via.placeholder.com/300x200/0000ff/ffffff?text=Wrangler+Denim",
+        "description": "Regular fit denim jacket with chest pockets",
+        "buy_link": "https://www.amazon.in/Wrangler-Mens-Denim-Jacket/dp/B08ABC456",
+        "category": "apparel",
+        "brand": "Wrangler",
+        "color": "blue",
+        "platform": "Amazon"
+    },
+    {
+        "name": "Pepe Jeans Denim Jacket",
+        "price": 1799,
+        "rating": 4.2,
+        "image_url": "https://via.placeholder.com/300x200/0000ff/ffffff?text=Pepe+Jeans",
+        "description": "Stylish denim jacket with modern fit",
+        "buy_link": "https://www.amazon.in/Pepe-Jeans-Denim-Jacket/dp/B08DEF789",
+        "category": "apparel",
+        "brand": "Pepe Jeans",
+        "color": "blue",
+        "platform": "Amazon"
+    }
+)
+
+_FLIPKART_MOCKS = (
+    {
+        "name": "United Colors of Benetton Denim Jacket",
+        "price": 1699,
+        "rating": 4.4,
+        "image_url": "https://via.placeholder.com/300x200/0000ff/ffffff?text=UCB+Denim",
+        "description": "Premium denim jacket with contemporary design",
+        "buy_link": "https://www.flipkart.com/ucb-denim-jacket/p/itm123456",
+        "category": "apparel",
+        "brand": "UCB",
+        "color": "blue",
+        "platform": "Flipkart"
+    },
+    {
+        "name": "Jack & Jones Denim Jacket",
+        "price": 1499,
+        "rating": 4.0,
+        "image_url": "https://via.placeholder.com/300x200/0000ff/ffffff?text=JackJones+Denim",
+        "description": "Classic denim jacket with modern styling",
+        "buy_link": "https://www.flipkart.com/jack-jones-denim-jacket/p/itm789012",
+        "category": "apparel",
+        "brand": "Jack & Jones",
+        "color": "blue",
+        "platform": "Flipkart"
+    }
+)
+
+
+def _search_rows(products):
+    rows = []
+    for p in products:
+        text = f"{p['name']} {p['description']}".lower()
+        rows.append((text, frozenset(text.split()), p['price'], p))
+    return tuple(rows)
+
+
+_AMAZON_ROWS = _search_rows(_AMAZON_MOCKS)
+_FLIPKART_ROWS = _search_rows(_FLIPKART_MOCKS)
 
 
 class URLBuilder:
@@ -18,59 +130,72 @@ class URLBuilder:
     def __init__(self):
         self.amazon_base = "https://www.amazon.in/s"
         self.flipkart_base = "https://www.flipkart.com/search"
-    
-    def build_amazon_url(self, query: str, max_price: int = None) -> str:
+        # URL structure is fixed, so the priced/unpriced templates are
+        # specialized once here; building becomes a single format call
+        self._amazon_tpl = f"{self.amazon_base}?k={{q}}&s=price-asc-rank"
+        self._amazon_tpl_priced = f"{self.amazon_base}?k={{q}}&rh=p_36%3A-{{mp}}&s=price-asc-rank"
+        self._flipkart_tpl = f"{self.flipkart_base}?q={{q}}&sort=price_asc"
+        self._flipkart_tpl_priced = (
+            f"{self.flipkart_base}?q={{q}}"
+            "&p%5B%5D=facets.price_range.from%3D0&p%5B%5D=facets.price_range.to%3D{mp}"
+            "&sort=price_asc"
+        )
+        # URL building is pure in (query, max_price); memoize so repeat
+        # searches skip the clean/quote/concat pipeline
+        self.build_amazon_url = functools.lru_cache(maxsize=1024)(self._build_amazon_url_impl)
+        self.build_flipkart_url = functools.lru_cache(maxsize=1024)(self._build_flipkart_url_impl)
+
+    @staticmethod
+    def _clean_query(query: str) -> str:
+        """Strip characters that don't belong in a search query
+
+        ASCII queries go through a translate deletion table; anything
+        with non-ASCII falls back to the \\w-aware regex.
+        """
+        lowered = query.lower()
+        if lowered.isascii():
+            return lowered.translate(_CLEAN_TRANS)
+        return _CLEAN_RE.sub('', lowered)
+
+    @classmethod
+    def _encode_query(cls, query: str) -> str:
+        """Clean and URL-encode a search query
+
+        After cleaning, ASCII queries only contain URL-safe characters
+        plus spaces, so a '+' substitution replaces the per-character
+        quote() walk; non-ASCII still goes through quote().
+        """
+        clean_query = cls._clean_query(query)
+        if clean_query.isascii():
+            return clean_query.replace(' ', '+')
+        return urllib.parse.quote(clean_query)
+
+    def _build_amazon_url_impl(self, query: str, max_price: int = None) -> str:
         """Build Amazon search URL with proper parameters"""
-        
-        # Clean and encode query
-        clean_query = re.sub(r'[^\w\s-]', '', query.lower())
-        encoded_query = urllib.parse.quote(clean_query)
-        
-        # Build base URL
-        url = f"{self.amazon_base}?k={encoded_query}"
-        
-        # Add price filter if provided
+        encoded_query = self._encode_query(query)
+
         if max_price:
-            url += f"&rh=p_36%3A-{max_price * 100}"
-        
-        # Add sorting by relevance
-        url += "&s=price-asc-rank"
-        
-        return url
-    
-    def build_flipkart_url(self, query: str, max_price: int = None) -> str:
+            return self._amazon_tpl_priced.format(q=encoded_query, mp=max_price * 100)
+        return self._amazon_tpl.format(q=encoded_query)
+
+    def _build_flipkart_url_impl(self, query: str, max_price: int = None) -> str:
         """Build Flipkart search URL with proper parameters"""
-        
-        # Clean and encode query
-        clean_query = re.sub(r'[^\w\s-]', '', query.lower())
-        encoded_query = urllib.parse.quote(clean_query)
-        
-        # Build base URL
-        url = f"{self.flipkart_base}?q={encoded_query}"
-        
-        # Add price filter if provided
+        encoded_query = self._encode_query(query)
+
         if max_price:
-            url += f"&p%5B%5D=facets.price_range.from%3D0&p%5B%5D=facets.price_range.to%3D{max_price}"
-        
-        # Add sorting
-        url += "&sort=price_asc"
-        
-        return url
+            return self._flipkart_tpl_priced.format(q=encoded_query, mp=max_price)
+        return self._flipkart_tpl.format(q=encoded_query)
     
     def build_search_urls(self, query: str, category: str = None, max_price: int = None) -> Dict[str, str]:
-        """Build URLs for both platforms"""
-        
-        urls = {}
-        
-        # Amazon URL
-        amazon_url = self.build_amazon_url(query, max_price)
-        urls['amazon'] = amazon_url
-        
-        # Flipkart URL
-        flipkart_url = self.build_flipkart_url(query, max_price)
-        urls['flipkart'] = flipkart_url
-        
-        return urls
+        """Build URLs for both platforms
+
+        A fresh dict wraps the memoized per-platform builds, so callers
+        can mutate the result without touching cached state.
+        """
+        return {
+            'amazon': self.build_amazon_url(query, max_price),
+            'flipkart': self.build_flipkart_url(query, max_price),
+        }
 
 
 class WebScraper:
@@ -85,11 +210,41 @@ class WebScraper:
             'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
         }
-    
-    def scrape_amazon(self, query: str, max_price: int = None) -> List[Dict[str, Any]]:
-        """Scrape Amazon for products"""
-        url = self.url_builder.build_amazon_url(query, max_price)
-        
+        # One session per scraper: connections to each platform are kept
+        # alive and reused instead of re-handshaking per request
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def fetch_page(self, url: str) -> Optional[str]:
+        """Fetch a page over the pooled session
+
+        Transport for real scraping; the mock product paths below never
+        touch the network.
+        """
+        try:
+            response = self.session.get(url, timeout=10)
+            response.raise_for_status()
+            return response.text
+        except requests.RequestException as e:
+            print(f"Error fetching {url}: {e}")
+            return None
+
+    def close(self):
+        """Release pooled connections"""
+        self.session.close()
+
+
+    def scrape_amazon(self, query: str, max_price: int = None, url: str = None) -> List[Dict[str, Any]]:
+        """Scrape Amazon for products
+
+        Callers that already built the search URL pass it in; otherwise
+        it comes from the memoized builder.
+        """
+        url = url or self.url_builder.build_amazon_url(query, max_price)
+
         try:
             # Mock scraping - in real implementation, use BeautifulSoup or similar
             products = self._mock_amazon_products(query, max_price)
@@ -98,10 +253,10 @@ class WebScraper:
             print(f"Error scraping Amazon: {e}")
             return []
     
-    def scrape_flipkart(self, query: str, max_price: int = None) -> List[Dict[str, Any]]:
+    def scrape_flipkart(self, query: str, max_price: int = None, url: str = None) -> List[Dict[str, Any]]:
         """Scrape Flipkart for products"""
-        url = self.url_builder.build_flipkart_url(query, max_price)
-        
+        url = url or self.url_builder.build_flipkart_url(query, max_price)
+
         try:
             # Mock scraping - in real implementation, use BeautifulSoup or similar
             products = self._mock_flipkart_products(query, max_price)
@@ -113,147 +268,63 @@ class WebScraper:
     def scrape_all_platforms(self, query: str, category: str = None, max_price: int = None) -> Dict[str, List[Dict[str, Any]]]:
         """Scrape products from all platforms"""
         
-        results = {
-            'amazon': self.scrape_amazon(query, max_price),
-            'flipkart': self.scrape_flipkart(query, max_price),
-            'urls': self.url_builder.build_search_urls(query, category, max_price)
+        urls = self.url_builder.build_search_urls(query, category, max_price)
+        amazon_future = _SCRAPE_POOL.submit(self.scrape_amazon, query, max_price, urls['amazon'])
+        flipkart_future = _SCRAPE_POOL.submit(self.scrape_flipkart, query, max_price, urls['flipkart'])
+
+        return {
+            'amazon': amazon_future.result(),
+            'flipkart': flipkart_future.result(),
+            'urls': urls
         }
-        
-        return results
     
     def _mock_amazon_products(self, query: str, max_price: int = None) -> List[Dict[str, Any]]:
         """Mock Amazon products for demonstration"""
-        
-        query_lower = query.lower()
-        mock_products = [
-            {
-                "name": "Levi's Men's Denim Jacket",
-                "price": 1899,
-                "rating": 4.3,
-                "image_url": "https://via.placeholder.com/300x200/0000ff/ffffff?text=Levi's+Denim",
-                "description": "Classic denim jacket with button closure, regular fit",
-                "buy_link": "https://www.amazon.in/Levis-Mens-Denim-Jacket/dp/B08XYZ123",
-                "category": "apparel",
-                "brand": "Levi's",
-                "color": "blue",
-                "platform": "Amazon"
-            },
-            {
-                "name": "Wrangler Men's Denim Jacket",
-                "price": 1599,
-                "rating": 4.1,
-                "image_url": "https://via.placeholder.com/300x200/0000ff/ffffff?text=Wrangler+Denim",
-                "description": "Regular fit denim jacket with chest pockets",
-                "buy_link": "https://www.amazon.in/Wrangler-Mens-Denim-Jacket/dp/B08ABC456",
-                "category": "apparel",
-                "brand": "Wrangler",
-                "color": "blue",
-                "platform": "Amazon"
-            },
-            {
-                "name": "Pepe Jeans Denim Jacket",
-                "price": 1799,
-                "rating": 4.2,
-                "image_url": "https://via.placeholder.com/300x200/0000ff/ffffff?text=Pepe+Jeans",
-                "description": "Stylish denim jacket with modern fit",
-                "buy_link": "https://www.amazon.in/Pepe-Jeans-Denim-Jacket/dp/B08DEF789",
-                "category": "apparel",
-                "brand": "Pepe Jeans",
-                "color": "blue",
-                "platform": "Amazon"
-            }
-        ]
-        
-        # Filter by price
-        if max_price:
-            mock_products = [p for p in mock_products if p['price'] <= max_price]
-        
-        # Filter by query keywords
-        keywords = query_lower.split()
-        filtered = []
-        for product in mock_products:
-            product_text = f"{product['name']} {product['description']}".lower()
-            if any(keyword in product_text for keyword in keywords):
-                filtered.append(product)
-        
-        return filtered
-    
+        return self._filter_mock_rows(_AMAZON_ROWS, query, max_price)
+
     def _mock_flipkart_products(self, query: str, max_price: int = None) -> List[Dict[str, Any]]:
         """Mock Flipkart products for demonstration"""
-        
-        query_lower = query.lower()
-        mock_products = [
-            {
-                "name": "United Colors of Benetton Denim Jacket",
-                "price": 1699,
-                "rating": 4.4,
-                "image_url": "https://via.placeholder.com/300x200/0000ff/ffffff?text=UCB+Denim",
-                "description": "Premium denim jacket with contemporary design",
-                "buy_link": "https://www.flipkart.com/ucb-denim-jacket/p/itm123456",
-                "category": "apparel",
-                "brand": "UCB",
-                "color": "blue",
-                "platform": "Flipkart"
-            },
-            {
-                "name": "Jack & Jones Denim Jacket",
-                "price": 1499,
-                "rating": 4.0,
-                "image_url": "https://via.placeholder.com/300x200/0000ff/ffffff?text=JackJones+Denim",
-                "description": "Classic denim jacket with modern styling",
-                "buy_link": "https://www.flipkart.com/jack-jones-denim-jacket/p/itm789012",
-                "category": "apparel",
-                "brand": "Jack & Jones",
-                "color": "blue",
-                "platform": "Flipkart"
-            }
+        return self._filter_mock_rows(_FLIPKART_ROWS, query, max_price)
+
+    @staticmethod
+    def _filter_mock_rows(rows, query: str, max_price: int = None) -> List[Dict[str, Any]]:
+        """Filter precomputed (search_text, product) rows by price and keywords"""
+        keywords = query.lower().split()
+        # Plain words match via one set intersection per product; anything
+        # with punctuation keeps the substring semantics
+        word_keywords = frozenset(k for k in keywords if k.isalnum())
+        substr_keywords = [k for k in keywords if not k.isalnum()]
+
+        # Price and keyword checks fused into one pass, no intermediate
+        # list; price rides in the row so no dict lookup per product
+        return [
+            product for text, tokens, price, product in rows
+            if (not max_price or price <= max_price)
+            and (not word_keywords.isdisjoint(tokens)
+                 or any(keyword in text for keyword in substr_keywords))
         ]
-        
-        # Filter by price
-        if max_price:
-            mock_products = [p for p in mock_products if p['price'] <= max_price]
-        
-        # Filter by query keywords
-        keywords = query_lower.split()
-        filtered = []
-        for product in mock_products:
-            product_text = f"{product['name']} {product['description']}".lower()
-            if any(keyword in product_text for keyword in keywords):
-                filtered.append(product)
-        
-        return filtered
     
     def extract_price_from_text(self, text: str) -> Optional[int]:
         """Extract price from text using regex"""
-        price_patterns = [
-            r'₹\s*(\d+(?:,\d+)*)',
-            r'Rs\.\s*(\d+(?:,\d+)*)',
-            r'(\d+(?:,\d+)*)\s*₹',
-            r'\$(\d+(?:\.\d+)*)'
-        ]
-        
-        for pattern in price_patterns:
-            match = re.search(pattern, text)
-            if match:
-                price_str = match.group(1).replace(',', '')
-                return int(float(price_str))
-        
+        match = _PRICE_RE.search(text)
+        if match:
+            price_str = (
+                match.group('rupee') or match.group('rs')
+                or match.group('suffix') or match.group('dollar')
+            ).replace(',', '')
+            return int(float(price_str))
+
         return None
-    
+
     def extract_rating_from_text(self, text: str) -> Optional[float]:
         """Extract rating from text"""
-        rating_patterns = [
-            r'(\d+\.?\d*)\s*out of\s*5',
-            r'(\d+\.?\d*)\s*stars?',
-            r'Rating:\s*(\d+\.?\d*)'
-        ]
-        
-        for pattern in rating_patterns:
-            match = re.search(pattern, text)
-            if match:
-                rating = float(match.group(1))
-                return min(rating, 5.0)
-        
+        match = _RATING_RE.search(text)
+        if match:
+            rating = float(
+                match.group('of5') or match.group('stars') or match.group('label')
+            )
+            return min(rating, 5.0)
+
         return None
 
 
@@ -263,23 +334,43 @@ class WebScrapingManager:
     def __init__(self):
         self.scraper = WebScraper()
         self.url_builder = URLBuilder()
-    
+        # Results are deterministic per (query, category, max_price)
+        # against the mock catalogs, so repeats come from a memo
+        self._search_cached = functools.lru_cache(maxsize=256)(self._search_products_impl)
+
     def search_products(self, query: str, category: str = None, max_price: int = None) -> Dict[str, Any]:
-        """Search products across all platforms"""
-        
+        """Search products across all platforms
+
+        Served from a per-instance memo; callers get a deep copy so
+        cached entries stay pristine if the response is mutated.
+        """
+        return copy.deepcopy(self._search_cached(query, category, max_price))
+
+    def clear_cache(self):
+        """Drop memoized search results (e.g. after upstream data changes)"""
+        self._search_cached.cache_clear()
+
+    def _search_products_impl(self, query: str, category: str = None, max_price: int = None) -> Dict[str, Any]:
+        """Run the full URL-build, scrape and rank pipeline"""
+
         # Build search URLs
         urls = self.url_builder.build_search_urls(query, category, max_price)
         
-        # Scrape from both platforms
-        amazon_results = self.scraper.scrape_amazon(query, max_price)
-        flipkart_results = self.scraper.scrape_flipkart(query, max_price)
-        
-        # Combine and rank results
-        all_products = amazon_results + flipkart_results
-        
-        # Sort by rating and price
-        all_products.sort(key=lambda x: (-x['rating'], x['price']))
-        
+        # Scrape both platforms concurrently, reusing the URLs built above
+        amazon_future = _SCRAPE_POOL.submit(self.scraper.scrape_amazon, query, max_price, urls['amazon'])
+        flipkart_future = _SCRAPE_POOL.submit(self.scraper.scrape_flipkart, query, max_price, urls['flipkart'])
+        amazon_results = amazon_future.result()
+        flipkart_results = flipkart_future.result()
+        
+        # Only the top 3 are returned, so heap-select them under the same
+        # (-rating, price) rank; chaining the platform lists lazily avoids
+        # materializing a combined list just to rank it
+        decorated = (
+            (-p['rating'], p['price'], i, p)
+            for i, p in enumerate(itertools.chain(amazon_results, flipkart_results))
+        )
+        top_products = [entry[3] for entry in heapq.nsmallest(3, decorated)]
+
         return {
             'success': True,
             'query': query,
@@ -287,8 +378,8 @@ class WebScrapingManager:
             'flipkart_url': urls['flipkart'],
             'amazon_count': len(amazon_results),
             'flipkart_count': len(flipkart_results),
-            'total_found': len(all_products),
-            'products': all_products[:3],
+            'total_found': len(amazon_results) + len(flipkart_results),
+            'products': top_products,
             'urls': urls
         }
     